@@ -0,0 +1,62 @@
+"""
+Compara o armor atual de Ferramental com a implementação anterior, baseada
+ em textwrap.fill e em splitlines.
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.armor [tamanhos em MB...]
+
+Sem argumentos, usa cargas de 1, 10 e 100 MB. O custo de textwrap.fill
+ cresce de forma quadrática com o tamanho de um token único (cerca de 1 s
+ para 1 MB e 145 s para 10 MB), então a versão antiga só é medida até
+ LIMITE_TEXTWRAP_MB.
+"""
+import base64
+import os
+import sys
+import textwrap
+import time
+
+from src.ferramental import Ferramental
+
+LIMITE_TEXTWRAP_MB = 10
+
+
+def armored_textwrap(base_bytes: bytes, service: str = '', width: int = 72) -> str:
+    end_banner, start_banner = Ferramental.create_banners(service)
+    wrapped = textwrap.fill(base64.b64encode(base_bytes).decode('utf-8'), width)
+    return f"{start_banner}\n{wrapped}\n{end_banner}"
+
+
+def unarmor_splitlines(base_str: str, service: str = '') -> bytes:
+    lines = base_str.splitlines()
+    end_banner, start_banner = Ferramental.create_banners(service)
+    start_idx = lines.index(start_banner)
+    end_idx = lines.index(end_banner)
+    return base64.b64decode(''.join(lines[start_idx + 1:end_idx]).strip())
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main(tamanhos):
+    print(f"{'MB':>5} {'armored':>10} {'textwrap':>10} {'unarmor':>10} {'splitlines':>11}")
+    for megabytes in tamanhos:
+        dados = os.urandom(megabytes * 1024 * 1024)
+        novo, t_armored = cronometrar(Ferramental.armored, dados, "message")
+        t_textwrap = '-'
+        if megabytes <= LIMITE_TEXTWRAP_MB:
+            antigo, t_textwrap = cronometrar(armored_textwrap, dados, "message")
+            assert novo == antigo
+            t_textwrap = f"{t_textwrap:.3f}s"
+        decodificado, t_unarmor = cronometrar(Ferramental.unarmor, novo, "message")
+        assert decodificado == dados
+        _, t_splitlines = cronometrar(unarmor_splitlines, novo, "message")
+        print(f"{megabytes:>5} {t_armored:>9.3f}s {t_textwrap:>10} {t_unarmor:>9.3f}s {t_splitlines:>10.3f}s")
+
+
+if __name__ == '__main__':
+    main([int(tamanho) for tamanho in sys.argv[1:]] or [1, 10, 100])
@@ -3,16 +3,20 @@ import binascii
 import hashlib
 import json
 import math
+import os
 import secrets
 import uuid
+from concurrent.futures import Executor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
 from json import JSONDecodeError
-from typing import Any, Dict, List, Optional, Self, Union
+from typing import Any, Callable, Dict, List, Optional, Self, Tuple, Union
 
 import sympy
 
+from src import simetrica
+from src.assimetrica import binario as formato_binario, primos, resumo as resumos
 from src.ferramental import Ferramental
 
 
@@ -48,10 +52,137 @@ class ChavePublica(Chave):
 @dataclass
 class ChavePrivada(Chave):
     d: int = None
+    p: int = None
+    q: int = None
+    dp: int = None
+    dq: int = None
+    qinv: int = None
+    outros_primos: List[Dict[str, int]] = None
 
     def __eq__(self, other):
         return self.d == other.d and super.__eq__(self, other)
 
+    @property
+    def has_crt(self) -> bool:
+        return None not in (self.p, self.q, self.dp, self.dq, self.qinv)
+
+    def exponenciar(self, valor: int) -> int:
+        """
+        Eleva um valor ao expoente privado, módulo n.
+
+        Quando os parâmetros do Teorema Chinês do Resto (p, q, dp, dq e qinv)
+         estão presentes, a exponenciação é feita separadamente módulo p e
+         módulo q, com expoentes e módulos com metade do tamanho, e os
+         resultados são recombinados (Garner). Em chaves com mais de dois
+         primos, cada primo adicional r (com expoente d e coeficiente t) é
+         incorporado da mesma forma. Caso contrário, usa-se pow(valor, d, n).
+
+        Args:
+            valor (int): O valor a ser elevado ao expoente privado.
+
+        Returns:
+            int: valor^d mod n.
+        """
+        if not self.has_crt:
+            return pow(valor, self.d, self.n)
+        m1 = pow(valor % self.p, self.dp, self.p)
+        m2 = pow(valor % self.q, self.dq, self.q)
+        h = (self.qinv * (m1 - m2)) % self.p
+        m = m2 + h * self.q
+        if self.outros_primos:
+            produto = self.p * self.q
+            for primo in self.outros_primos:
+                r = primo['r']
+                mi = pow(valor % r, primo['d'], r)
+                h = ((mi - m) * primo['t']) % r
+                m += produto * h
+                produto *= r
+        return m
+
+
+class ChavePublicaPreguicosa(ChavePublica):
+    """
+    Chave pública lida do formato binário em que só os metadados (serial,
+     issued_at, issued_to e size) são decodificados na carga. Os inteiros n e
+     e são decodificados no primeiro acesso.
+
+    Atributos:
+        _dados (bytes): A chave no formato binário, até ser decodificada.
+        _posicao (int): A posição em que começam os inteiros.
+    """
+
+    def __init__(self, issued_at: datetime = None, issued_to: str = None, serial: str = None,
+                 size: int = None, dados: bytes = None, posicao: int = 0):
+        self._dados = dados
+        self._posicao = posicao
+        self._n = None
+        self._e = None
+        self.issued_at = issued_at
+        self.issued_to = issued_to
+        self.serial = serial
+        self.size = size
+
+    @staticmethod
+    def carregar(dados: Union[bytes, str]) -> Optional['ChavePublicaPreguicosa']:
+        """
+        Lê os metadados de uma chave pública binária, armored ou não.
+
+        Args:
+            dados (Union[bytes, str]): A chave pública no formato binário ou armored.
+
+        Returns:
+            Optional[ChavePublicaPreguicosa]: A chave, ou None se não for uma chave pública
+            binária válida.
+        """
+        if isinstance(dados, str):
+            try:
+                dados = Ferramental.unarmor(dados, "public key")
+            except ValueError:
+                return None
+        if not formato_binario.eh_chave_binaria(dados):
+            return None
+        dados = bytes(dados)
+        lido = formato_binario.ler_metadados_chave(dados)
+        if lido is None or lido[0] != formato_binario.CHAVE_PUBLICA:
+            return None
+        _, metadados, posicao = lido
+        return ChavePublicaPreguicosa(dados=dados, posicao=posicao, **metadados)
+
+    def _decodificar(self) -> None:
+        if self._dados is None:
+            return
+        inteiros = formato_binario.ler_inteiros_chave(self._dados,
+                                                      formato_binario.CHAVE_PUBLICA,
+                                                      self._posicao)
+        self._dados = None
+        if inteiros is not None:
+            self._n = inteiros['n']
+            self._e = inteiros['e']
+
+    @property
+    def decodificada(self) -> bool:
+        return self._dados is None
+
+    @property
+    def n(self) -> int:
+        self._decodificar()
+        return self._n
+
+    @n.setter
+    def n(self, value: int):
+        self._decodificar()
+        self._n = value
+
+    @property
+    def e(self) -> int:
+        self._decodificar()
+        return self._e
+
+    @e.setter
+    def e(self, value: int):
+        self._decodificar()
+        self._e = value
+
 
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -62,60 +193,156 @@ class CustomJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+# Abaixo desta quantidade de chunks o custo de enviar os lotes a outros
+# processos supera o ganho, e a exponenciação é feita no processo atual
+LIMIAR_PARALELO = 64
+
+
+def _exponenciar_lote(lote: List[int], chave: Chave) -> List[int]:
+    if isinstance(chave, ChavePrivada):
+        return [chave.exponenciar(chunk) for chunk in lote]
+    return [pow(chunk, chave.e, chave.n) for chunk in lote]
+
+
+def exponenciar_chunks(chunks: List[int],
+                       chave: Chave,
+                       executor: Executor = None,
+                       limiar: int = LIMIAR_PARALELO) -> List[int]:
+    """
+    Exponencia uma lista de chunks com o expoente da chave, módulo n.
+
+    Com uma chave pública usa-se pow(chunk, e, n); com uma chave privada,
+     ChavePrivada.exponenciar. Se um executor for fornecido e houver ao menos
+     `limiar` chunks, a lista é dividida em lotes contíguos distribuídos pelo
+     executor, e os resultados são reunidos na ordem original.
+
+    Args:
+        chunks (List[int]): Os chunks a exponenciar.
+        chave (Chave): A chave pública ou privada.
+        executor (Executor, opcional): Um executor, normalmente um ProcessPoolExecutor.
+        limiar (int): A quantidade mínima de chunks para usar o executor. Padrão é
+            LIMIAR_PARALELO.
+
+    Returns:
+        List[int]: Os chunks exponenciados, na mesma ordem.
+    """
+    if executor is None or len(chunks) < max(limiar, 1):
+        return _exponenciar_lote(chunks, chave)
+    tamanho = max(1, math.ceil(len(chunks) / (4 * (os.cpu_count() or 1))))
+    lotes = [chunks[i:i + tamanho] for i in range(0, len(chunks), tamanho)]
+    resultado = []
+    for lote in executor.map(_exponenciar_lote, lotes, [chave] * len(lotes)):
+        resultado += lote
+    return resultado
+
+
 class Mensagem:
     """
     Classe para manipulação de mensagens, permitindo operações como cifrar,
      decifrar, assinar e verificar assinaturas.
 
+    O conteúdo é mantido num bytearray, de modo que append tenha custo
+     amortizado O(1), e a cópia imutável devolvida por conteudo só é refeita
+     depois de alguma alteração.
+
+    O SHA-256 do conteúdo é incremental: depois do primeiro cálculo, append
+     só alimenta o estado com os bytes novos. Os resumos (de qualquer
+     algoritmo) ficam guardados até o conteúdo mudar. Atribuir conteudo ou
+     carregar chunks descarta o estado.
+
     Atributos:
-        _conteudo (bytes): O conteúdo da mensagem em bytes.
-        _size (int): O tamanho do conteúdo da mensagem.
+        _buffer (bytearray): O conteúdo da mensagem.
+        _bytes (Optional[bytes]): Cópia imutável do conteúdo, ou None se o buffer mudou.
+        _hash (Optional[hashlib._Hash]): O estado do SHA-256 sobre todo o buffer, ou None
+            se ainda não foi calculado.
+        _resumos (Dict[Tuple[str, Optional[int]], bytes]): Os resumos guardados, por
+            algoritmo e tamanho de folha.
     """
 
+    __slots__ = ('_buffer', '_bytes', '_hash', '_resumos')
+
     def __init__(self, conteudo: Union[str, bytes] = None):
-        if conteudo is None:
-            self._conteudo = b''
-            self._size = 0
-            return
-        elif isinstance(conteudo, str):
-            self._conteudo = conteudo.encode('utf-8')
-        elif isinstance(conteudo, bytes):
-            self._conteudo = conteudo
-        else:
-            raise ValueError("Tipo incorreto")
-        self._size = len(self._conteudo)
+        self._buffer = bytearray()
+        self._bytes = b''
+        self._hash = None
+        self._resumos = {}
+        if conteudo is not None:
+            self.conteudo = conteudo
 
     def __str__(self) -> str:
-        return self._conteudo.decode('utf-8')
+        return self._buffer.decode('utf-8')
 
     @property
     def conteudo(self) -> bytes:
-        return self._conteudo
+        if self._bytes is None:
+            self._bytes = bytes(self._buffer)
+        return self._bytes
 
     @conteudo.setter
     def conteudo(self, value: Union[str, bytes]):
         if value is None:
-            self._conteudo = b''
+            value = b''
         elif isinstance(value, str):
-            self._conteudo = value.encode('utf-8')
-        elif isinstance(value, bytes):
-            self._conteudo = value
-        else:
+            value = value.encode('utf-8')
+        elif isinstance(value, (bytearray, memoryview)):
+            value = bytes(value)
+        elif not isinstance(value, bytes):
             raise ValueError("Tipo incorreto")
-        self._size = len(self._conteudo)
+        self._buffer = bytearray(value)
+        self._bytes = value
+        self._hash = None
+        self._resumos = {}
 
     @property
     def size(self) -> int:
-        return self._size
+        return len(self._buffer)
 
     @property
     def as_int(self) -> int:
-        return int.from_bytes(self._conteudo, byteorder='big')
+        return int.from_bytes(self._buffer, byteorder='big')
+
+    @property
+    def resumo(self) -> bytes:
+        """
+        O SHA-256 do conteúdo, calculado uma única vez enquanto o conteúdo não mudar.
+        """
+        return self.resumir()
+
+    def resumir(self,
+                algoritmo: str = resumos.PADRAO,
+                folha: int = None,
+                executor: Executor = None) -> bytes:
+        """
+        Calcula o resumo do conteúdo, ou devolve o já calculado se o conteúdo
+         não mudou.
+
+        Args:
+            algoritmo (str): sha256, sha512 ou blake2b. Padrão é sha256.
+            folha (int, opcional): Se informado, usa o resumo em árvore com folhas desse
+            tamanho, resumidas em paralelo (ver assimetrica.resumo).
+            executor (Executor, opcional): O executor das folhas no modo árvore.
+
+        Returns:
+            bytes: O resumo.
+        """
+        chave = (algoritmo, folha)
+        if chave not in self._resumos:
+            if chave == (resumos.PADRAO, None):
+                if self._hash is None:
+                    self._hash = hashlib.sha256(self._buffer)
+                self._resumos[chave] = self._hash.digest()
+            else:
+                self._resumos[chave] = resumos.resumir(self._buffer, algoritmo, folha, executor)
+        return self._resumos[chave]
+
+    @property
+    def resumo_hex(self) -> str:
+        return self.resumo.hex()
 
     # noinspection InsecureHash
     @property
     def get_hash(self):
-        return hashlib.sha256(self._conteudo).hexdigest()
+        return self.resumo_hex
 
     def append(self, chunk: Union[str, bytes, int]) -> bool:
         """
@@ -130,14 +357,16 @@ class Mensagem:
                   False caso contrário.
             """
         if isinstance(chunk, str):
-            self._conteudo += chunk.encode('utf-8')
-        elif isinstance(chunk, bytes):
-            self._conteudo += chunk
+            chunk = chunk.encode('utf-8')
         elif isinstance(chunk, int):
-            self._conteudo += chunk.to_bytes((chunk.bit_length() + 7) // 8, byteorder='big')
-        else:
+            chunk = chunk.to_bytes((chunk.bit_length() + 7) // 8, byteorder='big')
+        elif not isinstance(chunk, (bytes, bytearray, memoryview)):
             raise ValueError("Tipo incorreto")
-        self._size = len(self._conteudo)
+        self._buffer += chunk
+        if self._hash is not None:
+            self._hash.update(chunk)
+        self._bytes = None
+        self._resumos = {}
         return True
 
     def loads(self, chunks: List[Union[bytes, int]],
@@ -167,8 +396,8 @@ class Mensagem:
             return False
         if has_padding and len(padding) != 1:
             return False
-        content = b''
         inicio = 1 if has_padding else 0
+        blocos = []
         for chunk in chunks:
             if isinstance(chunk, int):
                 data = chunk.to_bytes((chunk.bit_length() + 7) // 8, byteorder='big')
@@ -178,10 +407,17 @@ class Mensagem:
                 return False
             if has_padding and data[0] != int.from_bytes(padding):
                 return False
-            if has_crc and Ferramental.crc8(data) != b'\x00':
-                return False
-            content += data[inicio:-1]
-        self.conteudo = content
+            blocos.append(data)
+        if has_crc and any(Ferramental.crc8_lote(blocos)):
+            return False
+        buffer = bytearray()
+        for data in blocos:
+            with memoryview(data) as visao:
+                buffer += visao[inicio:-1]
+        self._buffer = buffer
+        self._bytes = None
+        self._hash = None
+        self._resumos = {}
         return True
 
     def dumps(self, size: int = 1,
@@ -216,43 +452,120 @@ class Mensagem:
         actual_size = size - (1 if add_crc else 0) - (1 if add_padding else 0)
         if actual_size < 1:
             return None
-        chunks = list()
-        for i in range(0, len(self._conteudo), actual_size):
-            content = padding if add_padding else b''
-            content += self._conteudo[i:i + actual_size]
-            if add_crc:
-                content += Ferramental.crc8(content)
-            chunks.append(content if as_bytes else int.from_bytes(content, byteorder='big'))
+        prefixo = padding if add_padding else b''
+        with memoryview(self._buffer) as visao:
+            chunks = [prefixo + visao[i:i + actual_size] for i in range(0, len(visao), actual_size)]
+        if add_crc:
+            crcs = Ferramental.crc8_lote(chunks)
+            chunks = [content + crcs[i:i + 1] for i, content in enumerate(chunks)]
+        if not as_bytes:
+            chunks = [int.from_bytes(content, byteorder='big') for content in chunks]
         return chunks
 
+    @staticmethod
+    def tamanho_chunk(chave: Chave) -> int:
+        """
+        Calcula o maior tamanho de chunk, em bytes, com padding e CRC incluídos,
+         que garante que todo chunk seja menor que o módulo n.
+
+        Qualquer valor de t bytes é menor que 256^t, que não passa de n enquanto
+         8t <= n.bit_length() - 1.
+
+        Args:
+            chave (Chave): A chave cujo módulo limita o chunk.
+
+        Returns:
+            int: O tamanho do chunk em bytes.
+        """
+        return (chave.n.bit_length() - 1) // 8
+
+    @staticmethod
+    def estimar_chunks(chave: Chave,
+                       tamanho_mensagem: int,
+                       add_padding: bool = True,
+                       add_crc: bool = True,
+                       size: int = None) -> Optional[Dict[str, Any]]:
+        """
+        Estima quantos chunks (e exponenciações) uma mensagem cifrada terá.
+
+        Args:
+            chave (Chave): A chave usada para cifrar.
+            tamanho_mensagem (int): O tamanho da mensagem em bytes.
+            add_padding (bool): Indica se os chunks terão padding. Padrão é True.
+            add_crc (bool): Indica se os chunks terão CRC. Padrão é True.
+            size (int): O tamanho de cada chunk. Se None, usa tamanho_chunk.
+
+        Returns:
+            Optional[Dict[str, Any]]: Um dicionário com 'chunk_size' (bytes por chunk),
+            'payload_size' (bytes de conteúdo por chunk), 'chunks' (quantidade de chunks) e
+            'expansion' (bytes cifrados por byte de mensagem, considerando que cada chunk
+            cifrado ocupa o tamanho de n), ou None se o chunk não comportar conteúdo.
+        """
+        if chave.n is None or tamanho_mensagem < 0:
+            return None
+        if size is None:
+            size = Mensagem.tamanho_chunk(chave)
+        carga = size - (1 if add_padding else 0) - (1 if add_crc else 0)
+        if carga < 1:
+            return None
+        chunks = (tamanho_mensagem + carga - 1) // carga
+        cifrado = chunks * ((chave.n.bit_length() + 7) // 8)
+        return {
+            'chunk_size'  : size,
+            'payload_size': carga,
+            'chunks'      : chunks,
+            'expansion'   : cifrado / tamanho_mensagem if tamanho_mensagem else 0.0,
+        }
+
     def cifrar(self,
                chave: ChavePublica,
                add_padding: bool = True,
                padding: bytes = b'\x9F',
                add_crc=True,
                size: int = None,
-               armored: bool = False) -> Optional[Union[str, Dict[str, Any]]]:
+               armored: bool = False,
+               envelope: bool = False,
+               executor: Executor = None,
+               binario: bool = False) -> Optional[Union[str, bytes, Dict[str, Any]]]:
         """
         Cifra o conteúdo da mensagem usando uma chave pública.
 
+        No modo envelope, o conteúdo é cifrado com uma chave Fernet aleatória
+         (simetrica.cifrar) e apenas essa chave é cifrada com RSA. O custo em
+         exponenciações deixa de crescer com o tamanho da mensagem.
+
         Args:
             chave (ChavePublica): A chave pública usada para cifrar a mensagem.
             add_padding (bool): Indica se deve adicionar padding aos chunks. Padrão é True.
             padding (bytes): O byte de padding a ser adicionado. Padrão é b'\x9F'.
             add_crc (bool): Indica se deve adicionar CRC aos chunks. Padrão é True.
-            size (int): O tamanho de cada chunk. Se None, será calculado automaticamente.
+            size (int): O tamanho de cada chunk. Se None, usa o maior tamanho cujos chunks são
+            sempre menores que n (ver tamanho_chunk).
             armored (bool): Indica se a mensagem cifrada deve ser retornada em formato armored.
             Padrão é False.
+            envelope (bool): Indica se deve usar o modo envelope (RSA + Fernet). Padrão é False.
+            executor (Executor): Executor opcional para exponenciar os chunks em paralelo (ver
+            exponenciar_chunks).
+            binario (bool): Indica se a mensagem cifrada deve ser retornada no formato binário
+            compacto (ver assimetrica.binario). Tem precedência sobre armored. Padrão é False.
 
         Returns:
-            Optional[Union[str, Dict[str, Any]]]: A mensagem cifrada em formato dict ou string se
-            armored for True, ou None se ocorrer um erro.
+            Optional[Union[str, bytes, Dict[str, Any]]]: A mensagem cifrada em formato dict,
+            string se armored for True ou bytes se binario for True, ou None se ocorrer um erro.
         """
         if chave.e is None or chave.n is None:
             return None
         if size is None:
-            size = chave.size + 7 // 8
-        chunks = self.dumps(size=size,
+            size = Mensagem.tamanho_chunk(chave)
+        payload = None
+        origem = self
+        if envelope:
+            chave_simetrica = simetrica.gerar_chave()
+            payload = simetrica.cifrar(chave_simetrica, self.conteudo)
+            if payload is None:
+                return None
+            origem = Mensagem(chave_simetrica)
+        chunks = origem.dumps(size=size,
                             as_bytes=False,
                             add_padding=add_padding,
                             padding=padding,
@@ -268,8 +581,15 @@ class Mensagem:
         }
         if add_padding:
             cifrado['padding'] = padding
-        for chunk in chunks:
-            cifrado['chunks'].append(pow(chunk, chave.e, chave.n))
+        if envelope:
+            # Os chunks levam a chave Fernet; o conteúdo vai no payload
+            cifrado['envelope'] = True
+            cifrado['payload'] = payload.decode('utf-8')
+        cifrado['chunks'] = exponenciar_chunks(chunks, chave, executor)
+        if binario:
+            return formato_binario.codificar(cifrado,
+                                             largura=(chave.n.bit_length() + 7) // 8,
+                                             tipo=formato_binario.TIPO_MENSAGEM)
         if not armored:
             return cifrado
         try:
@@ -282,14 +602,22 @@ class Mensagem:
 
     def decifrar(self,
                  chave: ChavePrivada,
-                 msg: Union[str, Dict[str, Any]]) -> bool:
+                 msg: Union[str, bytes, Dict[str, Any]],
+                 executor: Executor = None) -> bool:
         """
         Decifra o conteúdo da mensagem usando uma chave privada.
 
+        Mensagens cifradas no modo envelope e no formato binário são
+         detectadas automaticamente.
+
         Args:
             chave (ChavePrivada): A chave privada usada para decifrar a mensagem.
-            msg (Union[str, Dict[str, Any]]): A mensagem cifrada, que pode ser
-                                              uma string ou um dicionário.
+            msg (Union[str, bytes, Dict[str, Any]]): A mensagem cifrada, que pode
+                                                     ser uma string, bytes no
+                                                     formato binário ou um
+                                                     dicionário.
+            executor (Executor): Executor opcional para exponenciar os chunks em
+                                 paralelo (ver exponenciar_chunks).
 
         Returns:
             bool: True se a decifração for bem-sucedida. False caso contrário.
@@ -309,12 +637,19 @@ class Mensagem:
                 return False
         elif isinstance(msg, dict):
             content = msg
+        elif formato_binario.eh_binario(msg):
+            decodificado = formato_binario.decodificar(msg)
+            if decodificado is None or decodificado[0] != formato_binario.TIPO_MENSAGEM:
+                return False
+            content = decodificado[1]
         else:
             return False
         if content.get('key_serial') != chave.serial:
             return False
         padding = b'\x9F'
-        if content.get('padding', None) is not None:
+        if isinstance(content.get('padding', None), bytes):  # Dicionário não serializado
+            padding = content.get('padding')
+        elif content.get('padding', None) is not None:
             try:
                 padding = base64.b64decode(content.get('padding'))
             except (binascii.Error, ValueError):
@@ -322,17 +657,60 @@ class Mensagem:
         chunks = content.get('chunks')
         if chunks is None:
             return False
-        decifrado = list()
-        for chunk in chunks:
-            decifrado.append(pow(chunk, chave.d, chave.n))
-        return self.loads(decifrado,
-                          has_padding=content.get('has_padding', True),
-                          padding=padding,
-                          has_crc=content.get('has_crc', True))
+        decifrado = exponenciar_chunks(chunks, chave, executor)
+        if not content.get('envelope', False):
+            return self.loads(decifrado,
+                              has_padding=content.get('has_padding', True),
+                              padding=padding,
+                              has_crc=content.get('has_crc', True))
+        chave_simetrica = Mensagem()
+        if not chave_simetrica.loads(decifrado,
+                                     has_padding=content.get('has_padding', True),
+                                     padding=padding,
+                                     has_crc=content.get('has_crc', True)):
+            return False
+        payload = content.get('payload')
+        if not isinstance(payload, str):
+            return False
+        try:
+            conteudo = simetrica.decifrar(chave_simetrica.conteudo, payload.encode('utf-8'))
+        except ValueError:  # Chave Fernet malformada
+            return False
+        if conteudo is None:
+            return False
+        self.conteudo = conteudo
+        return True
+
+    @staticmethod
+    def _bloco_assinatura(resumo: bytes, n: int) -> Optional[bytes]:
+        """
+        Monta o bloco único da assinatura versão 2.
+
+        O bloco tem o maior tamanho em bytes que é sempre menor que n, e é
+         composto por 0x01, bytes 0xFF de preenchimento, 0x00 e o resumo,
+         já identificado com o algoritmo e a folha (ver resumo.identificar).
+
+        Args:
+            resumo (bytes): O resumo identificado da mensagem.
+            n (int): O módulo da chave.
+
+        Returns:
+            Optional[bytes]: O bloco ou None se o módulo for pequeno demais.
+        """
+        tamanho = (n.bit_length() - 1) // 8
+        preenchimento = tamanho - len(resumo) - 2
+        if preenchimento < 1:
+            return None
+        return b'\x01' + b'\xFF' * preenchimento + b'\x00' + resumo
 
     def assinar(self,
                 chave: ChavePrivada,
-                armored: bool = True) -> Optional[Union[str, Dict[str, Any]]]:
+                armored: bool = True,
+                versao: int = None,
+                binario: bool = False,
+                algoritmo: str = resumos.PADRAO,
+                folha: int = None,
+                executor: Executor = None) -> Optional[Union[str, bytes, Dict[str, Any]]]:
         """
         Assina o conteúdo da mensagem usando uma chave privada.
 
@@ -340,31 +718,80 @@ class Mensagem:
             chave (ChavePrivada): A chave privada usada para assinar a mensagem.
             armored (bool): Indica se a assinatura deve ser retornada em formato armored. Padrão
             é True.
+            versao (int): O formato da assinatura. A versão 1 divide o resumo hexadecimal em
+            chunks de 10 bytes com CRC, uma exponenciação por chunk. A versão 2 codifica o
+            resumo binário num único bloco do tamanho do módulo, uma só exponenciação. Se
+            None, usa a versão 2 quando o módulo comporta o bloco e a versão 1 caso contrário.
+            binario (bool): Indica se a assinatura deve ser retornada no formato binário
+            compacto (ver assimetrica.binario). Tem precedência sobre armored. Padrão é False.
+            algoritmo (str): O algoritmo do resumo: sha256, sha512 ou blake2b. Padrão é sha256.
+            folha (int, opcional): Se informado, o resumo é calculado em árvore, com folhas
+            desse tamanho em bytes resumidas em paralelo. Deve ser uma potência de 2 entre
+            1 KiB e 16 MiB.
+            executor (Executor, opcional): O executor das folhas no modo árvore. Se None, um
+            pool de threads é criado para o cálculo.
 
         Returns:
-            Optional[Union[str, Dict[str, Any]]]: A assinatura em formato dict ou string se
-            armored for True, ou None se ocorrer um erro.
+            Optional[Union[str, bytes, Dict[str, Any]]]: A assinatura em formato dict, string se
+            armored for True ou bytes se binario for True, ou None se ocorrer um erro.
+        """
+        try:
+            resumo = self.resumir(algoritmo, folha, executor)
+        except ValueError:
+            return None
+        return Mensagem._assinar_resumo(resumo, chave, armored, versao, binario, algoritmo, folha)
+
+    @staticmethod
+    def _assinar_resumo(resumo: bytes,
+                        chave: ChavePrivada,
+                        armored: bool = True,
+                        versao: int = None,
+                        binario: bool = False,
+                        algoritmo: str = resumos.PADRAO,
+                        folha: int = None) -> Optional[Union[str, bytes, Dict[str, Any]]]:
+        """
+        Assina um resumo já calculado. Ver assinar.
         """
         if chave.d is None or chave.n is None:
             return None
-        resumo = Mensagem(self.get_hash)
-        chunks = resumo.dumps(size=10,
-                              as_bytes=False,
-                              add_padding=False,
-                              add_crc=True)
-        del resumo
+        try:
+            resumo = resumos.identificar(resumo, algoritmo, folha)
+        except (TypeError, ValueError):
+            return None
+        bloco = Mensagem._bloco_assinatura(resumo, chave.n)
+        if versao is None:
+            versao = 1 if bloco is None else 2
+        if versao == 2:
+            if bloco is None:
+                return None
+            chunks = [int.from_bytes(bloco, byteorder='big')]
+        elif versao == 1:
+            chunks = Mensagem(resumo.hex()).dumps(size=10,
+                                                  as_bytes=False,
+                                                  add_padding=False,
+                                                  add_crc=True)
+        else:
+            return None
         if chunks is None:
             return None
         assinatura = {
+            'version'     : versao,
             'key_serial'  : chave.serial,
             'issued_to'   : chave.issued_to,
-            'has_crc'     : True,
+            'has_crc'     : versao == 1,
             'has_padding' : False,
             'generated_at': datetime.now(timezone.utc).replace(microsecond=0),
+            'digest'      : algoritmo,
             'chunks'      : [],
         }
+        if folha is not None:
+            assinatura['tree_leaf'] = folha
         for chunk in chunks:
-            assinatura['chunks'].append(pow(chunk, chave.d, chave.n))
+            assinatura['chunks'].append(chave.exponenciar(chunk))
+        if binario:
+            return formato_binario.codificar(assinatura,
+                                             largura=(chave.n.bit_length() + 7) // 8,
+                                             tipo=formato_binario.TIPO_ASSINATURA)
         if not armored:
             return assinatura
         try:
@@ -377,14 +804,20 @@ class Mensagem:
 
     def verificar_assinatura(self,
                              chave: ChavePublica,
-                             assinatura: Union[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+                             assinatura: Union[str, bytes, Dict[str, Any]],
+                             executor: Executor = None) -> Optional[Dict[str, Any]]:
         """
         Verifica a assinatura de uma mensagem usando uma chave pública.
 
+        O algoritmo do resumo (e o tamanho das folhas, no modo árvore) é lido
+         da assinatura; assinaturas sem esse campo usam SHA-256.
+
         Args:
             chave (ChavePublica): A chave pública usada para verificar a assinatura.
-            assinatura (Union[str, Dict[str, Any]]): A assinatura a ser verificada, que pode ser
-            uma string ou um dicionário.
+            assinatura (Union[str, bytes, Dict[str, Any]]): A assinatura a ser verificada, que
+            pode ser uma string, bytes no formato binário ou um dicionário.
+            executor (Executor, opcional): O executor das folhas, se a assinatura usar o
+            resumo em árvore.
 
         Returns:
             Optional[Dict[str, Any]]: Um dicionário contendo informações sobre a verificação da
@@ -395,30 +828,37 @@ class Mensagem:
                 - 'generated_at' (datetime): A data e hora em que a assinatura foi gerada.
                 - 'expected' (str): O hash esperado da mensagem.
         """
+        return Mensagem._verificar_resumo(
+                lambda algoritmo, folha: self.resumir(algoritmo, folha, executor),
+                chave,
+                assinatura)
+
+    @staticmethod
+    def _algoritmo_da_assinatura(content: Dict[str, Any]) -> Optional[Tuple[str, Optional[int]]]:
+        algoritmo = content.get('digest', resumos.PADRAO)  # Assinaturas sem o campo usam SHA-256
+        folha = content.get('tree_leaf')
+        try:
+            resumos.validar(algoritmo, folha)
+        except (TypeError, ValueError):
+            return None
+        return algoritmo, folha
+
+    @staticmethod
+    def _verificar_resumo(resumir: Callable[[str, Optional[int]], bytes],
+                          chave: ChavePublica,
+                          assinatura: Union[str, bytes, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Verifica uma assinatura obtendo o resumo de uma função que recebe o
+         algoritmo e o tamanho das folhas. Ver verificar_assinatura.
+        """
         retorno = {
             'valid': False
         }
         if chave.e is None or chave.n is None:
             return retorno
-        if isinstance(assinatura, str):
-            try:
-                content = Ferramental.unarmor(base_str=assinatura,
-                                              service="signature")
-            except ValueError:
-                retorno['reason'] = 'unarmor_error'
-                return retorno
-            if content is None:
-                retorno['reason'] = 'empty_message'
-                return retorno
-            try:
-                content = json.loads(content)
-            except json.decoder.JSONDecodeError:
-                retorno['reason'] = 'json_error'
-                return retorno
-        elif isinstance(assinatura, dict):
-            content = assinatura
-        else:
-            retorno['reason'] = 'empty_message'
+        content, motivo = Mensagem._ler_assinatura(assinatura)
+        if content is None:
+            retorno['reason'] = motivo
             return retorno
         if content.get('key_serial') != chave.serial:
             retorno['reason'] = 'key_mismatch'
@@ -427,20 +867,120 @@ class Mensagem:
         if chunks is None:
             retorno['reason'] = 'no_chunks'
             return retorno
-        decifrado = list()
-        for chunk in chunks:
-            decifrado.append(pow(chunk, chave.e, chave.n))
-        msg = Mensagem()
-        if not msg.loads(decifrado,
-                         has_padding=False,
-                         has_crc=True):
+        if not Mensagem._chunks_validos(chunks, chave.n):
+            retorno['reason'] = 'invalid_chunks'
+            return retorno
+        algoritmo = Mensagem._algoritmo_da_assinatura(content)
+        if algoritmo is None:
+            retorno['reason'] = 'unknown_digest'
+            return retorno
+        return Mensagem._conferir_resumo(resumir(*algoritmo), chave, content, exponenciar_chunks(chunks, chave))
+
+    @staticmethod
+    def _chunks_validos(chunks: Any, n: int) -> bool:
+        # Chunks de uma assinatura são sempre inteiros em [0, n)
+        return isinstance(chunks, list) and all(
+                isinstance(chunk, int) and not isinstance(chunk, bool) and 0 <= chunk < n for chunk in chunks)
+
+    @staticmethod
+    def _ler_assinatura(assinatura: Union[str, bytes, Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]],
+                                                                                Optional[str]]:
+        """
+        Obtém o dicionário de uma assinatura armored, binária ou já em dicionário.
+
+        Args:
+            assinatura (Union[str, bytes, Dict[str, Any]]): A assinatura.
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[str]]: O dicionário da assinatura e None,
+            ou None e o motivo ('reason') da falha.
+        """
+        if isinstance(assinatura, dict):
+            return assinatura, None
+        if formato_binario.eh_binario(assinatura):
+            decodificado = formato_binario.decodificar(assinatura)
+            if decodificado is None or decodificado[0] != formato_binario.TIPO_ASSINATURA:
+                return None, 'binary_error'
+            return decodificado[1], None
+        if not isinstance(assinatura, str):
+            return None, 'empty_message'
+        try:
+            content = Ferramental.unarmor(base_str=assinatura,
+                                          service="signature")
+        except ValueError:
+            return None, 'unarmor_error'
+        if content is None:
+            return None, 'empty_message'
+        try:
+            content = json.loads(content)
+        except ValueError:  # JSONDecodeError ou UnicodeDecodeError
+            return None, 'json_error'
+        if not isinstance(content, dict):
+            return None, 'json_error'
+        return content, None
+
+    def _conferir_assinatura(self,
+                             chave: ChavePublica,
+                             content: Dict[str, Any],
+                             decifrado: List[int]) -> Dict[str, Any]:
+        """
+        Confere os chunks de uma assinatura, já exponenciados com a chave
+         pública, contra o resumo desta mensagem.
+
+        Args:
+            chave (ChavePublica): A chave pública usada na exponenciação.
+            content (Dict[str, Any]): O dicionário da assinatura.
+            decifrado (List[int]): Os chunks da assinatura elevados a e, módulo n.
+
+        Returns:
+            Dict[str, Any]: O resultado no formato de verificar_assinatura.
+        """
+        algoritmo = Mensagem._algoritmo_da_assinatura(content)
+        if algoritmo is None:
+            return {'valid': False, 'reason': 'unknown_digest'}
+        return Mensagem._conferir_resumo(self.resumir(*algoritmo), chave, content, decifrado)
+
+    @staticmethod
+    def _conferir_resumo(resumo: bytes,
+                         chave: ChavePublica,
+                         content: Dict[str, Any],
+                         decifrado: List[int]) -> Dict[str, Any]:
+        # O bloco esperado é montado com o algoritmo e a folha declarados: se
+        # algum deles tiver sido alterado ou removido, o bloco não confere
+        retorno = {
+            'valid': False
+        }
+        algoritmo = Mensagem._algoritmo_da_assinatura(content)
+        if algoritmo is None:
+            retorno['reason'] = 'unknown_digest'
+            return retorno
+        resumo = resumos.identificar(resumo, *algoritmo)
+        versao = content.get('version', 1)  # Assinaturas sem versão são do formato original
+        if versao == 2:
+            esperado = Mensagem._bloco_assinatura(resumo, chave.n)
+            if esperado is None or len(decifrado) != 1:
+                retorno['reason'] = 'invalid_block'
+                return retorno
+            largura = (chave.n.bit_length() + 7) // 8
+            esperado = esperado.rjust(largura, b'\x00')
+            obtido = decifrado[0].to_bytes(largura, byteorder='big')
+        elif versao == 1:
+            msg = Mensagem()
+            if not msg.loads(decifrado,
+                             has_padding=False,
+                             has_crc=True):
+                return retorno
+            esperado = resumo.hex().encode('utf-8')
+            obtido = msg.conteudo
+        else:
+            retorno['reason'] = 'unknown_version'
             return retorno
         retorno['key_serial'] = chave.serial
         retorno['issued_to'] = content.get('issued_to', None)
         if content.get('generated_at', None) is not None:
             retorno['generated_at'] = Ferramental.safe_fromisoformat(content.get('generated_at'))
         # https://docs.python.org/3.13/library/secrets.html#secrets.compare_digest
-        r = secrets.compare_digest(self.get_hash, str(msg))
+        r = secrets.compare_digest(esperado, obtido)
         retorno['valid'] = r
         if not r:
             retorno['reason'] = 'hash_mismatch'
@@ -456,12 +996,21 @@ class ParDeChaves:
         _phi_n (int): O valor de phi(n) (função totiente de Euler).
         _e (int): O expoente público e da chave RSA.
         _d (int): O expoente privado d da chave RSA.
+        _p (int): O primeiro fator primo de n.
+        _q (int): O segundo fator primo de n.
+        _dp (int): d mod (p - 1), usado no Teorema Chinês do Resto.
+        _dq (int): d mod (q - 1), usado no Teorema Chinês do Resto.
+        _qinv (int): O inverso de q módulo p, usado no Teorema Chinês do Resto.
+        _outros_primos (List[Dict[str, int]]): Os primos além de p e q, em chaves com mais
+            de dois primos, com seus expoentes d e coeficientes t.
         _size (int): O tamanho da chave em bits.
         _issued_at (datetime): A data e hora de emissão da chave.
         _issued_to (str): O proprietário da chave.
         _serial (str): O número de série da chave.
         _has_private (bool): Indica se a chave privada está presente.
         _has_public (bool): Indica se a chave pública está presente.
+        _serializado (Dict[Tuple[str, bool, bool], Union[str, bytes]]): As formas serializadas
+            já produzidas por public e private.
     """
 
     def __init__(self):
@@ -469,6 +1018,12 @@ class ParDeChaves:
         self._phi_n = None
         self._e = None
         self._d = None
+        self._p = None
+        self._q = None
+        self._dp = None
+        self._dq = None
+        self._qinv = None
+        self._outros_primos = None
 
         self._size = None
         self._issued_at = None
@@ -476,6 +1031,7 @@ class ParDeChaves:
         self._serial = None
         self._has_private = False
         self._has_public = False
+        self._serializado = {}
 
     def __eq__(self, other: Self):
         return all([self.n == other.n,
@@ -514,6 +1070,38 @@ class ParDeChaves:
             self.n is None or self.n == other.n
         ])
 
+    def _crt_consistente(self) -> bool:
+        if None in (self.p, self.q, self.dp, self.dq, self.qinv):
+            return False
+        try:
+            fatores = [self.p, self.q] + [primo['r'] for primo in self.outros_primos or []]
+            if math.prod(fatores) != self.n:
+                return False
+            if self.dp != self.d % (self.p - 1) or self.dq != self.d % (self.q - 1):
+                return False
+            if (self.qinv * self.q) % self.p != 1:
+                return False
+            produto = self.p * self.q
+            for primo in self.outros_primos or []:
+                r = primo['r']
+                if primo['d'] != self.d % (r - 1) or (primo['t'] * produto) % r != 1:
+                    return False
+                produto *= r
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def _descartar_crt_inconsistente(self) -> None:
+        # Parâmetros do TCR que não batem com n e d produziriam resultados
+        # errados; sem eles, a chave usa o caminho pow(c, d, n)
+        if not self._crt_consistente():
+            self._p = None
+            self._q = None
+            self._dp = None
+            self._dq = None
+            self._qinv = None
+            self._outros_primos = None
+
     @staticmethod
     def melhor_e(phi_n) -> Optional[int]:
         valores_comuns_para_e = [65537, 17, 3]
@@ -531,10 +1119,15 @@ class ParDeChaves:
 
     @staticmethod
     def gerar_primo(bits: int = 16) -> int:
-        while True:
-            num = secrets.randbits(bits) | 1
-            if sympy.isprime(num):
-                return num
+        return primos.gerar_primo(bits)
+
+    @staticmethod
+    def _gerar_fatores(tamanhos: List[int], busca: primos.BuscaDePrimos) -> List[int]:
+        # Gera um primo para cada tamanho, agrupando os tamanhos iguais numa única busca
+        fatores = []
+        for tamanho in sorted(set(tamanhos), reverse=True):
+            fatores += busca.gerar(tamanho, tamanhos.count(tamanho))
+        return fatores
 
     @property
     def n(self):
@@ -548,6 +1141,30 @@ class ParDeChaves:
     def d(self):
         return self._d
 
+    @property
+    def p(self):
+        return self._p
+
+    @property
+    def q(self):
+        return self._q
+
+    @property
+    def dp(self):
+        return self._dp
+
+    @property
+    def dq(self):
+        return self._dq
+
+    @property
+    def qinv(self):
+        return self._qinv
+
+    @property
+    def outros_primos(self):
+        return self._outros_primos
+
     @property
     def phi_n(self):
         return self._phi_n
@@ -581,7 +1198,9 @@ class ParDeChaves:
                  p: int = None,
                  q: int = None,
                  issued_to: str = None,
-                 issued_at: datetime = None) -> bool:
+                 issued_at: datetime = None,
+                 workers: int = None,
+                 quantidade_primos: int = 2) -> bool:
         """
         Gera um par de chaves RSA.
 
@@ -594,6 +1213,11 @@ class ParDeChaves:
             issued_to (str): O proprietário da chave.
             issued_at (datetime): A data e hora de emissão da chave. Se None, a data e hora
             atuais serão usadas.
+            workers (int): O número de processos usados na busca dos primos. Se None ou 1,
+            a busca é feita sequencialmente no processo atual.
+            quantidade_primos (int): O número de fatores primos do módulo (2, 3 ou 4). Com
+            mais de dois, o módulo mantém 2 * bits bits e os primos ficam menores, o que
+            barateia a geração e as operações privadas. Padrão é 2.
 
         Returns:
             bool: True se a geração das chaves for bem-sucedida, False caso contrário.
@@ -604,44 +1228,100 @@ class ParDeChaves:
         if bits < 16:  # Muito curto não dá certo
             return False
 
+        if quantidade_primos not in (2, 3, 4):
+            return False
+
         self._size = bits
-        if p is None or not sympy.isprime(p):
-            p = ParDeChaves.gerar_primo(self.size)
-        if q is None or not sympy.isprime(q):
-            q = ParDeChaves.gerar_primo(self.size)
-        while True:
-            while p == q:
-                q = ParDeChaves.gerar_primo(self.size)
-
-            self._phi_n = (p - 1) * (q - 1)
-
-            self._e = ParDeChaves.melhor_e(self.phi_n)
-            if self.e is not None:
-                break
-            q = None
-
-        self._n = p * q
+        # O módulo tem sempre 2 * bits bits, repartidos entre os primos
+        tamanhos = [2 * self.size // quantidade_primos + (1 if i < 2 * self.size % quantidade_primos else 0)
+                    for i in range(quantidade_primos)]
+        fornecidos = [fator for fator in (p, q) if fator is not None and primos.eh_primo(fator)]
+        exigir_tamanho = quantidade_primos > 2 and not fornecidos
+        fatores = None
+        with primos.BuscaDePrimos(workers) as busca:
+            while True:
+                if fatores is None:
+                    fatores = fornecidos + ParDeChaves._gerar_fatores(tamanhos[len(fornecidos):], busca)
+                if len(set(fatores)) != len(fatores):
+                    fatores[-1] = busca.gerar(tamanhos[-1])[0]
+                    continue
+                if exigir_tamanho and math.prod(fatores).bit_length() != 2 * self.size:
+                    # Os primos já sorteados podem tornar o tamanho inalcançável
+                    # trocando só o último; sorteia todos novamente
+                    fatores = None
+                    continue
+
+                self._phi_n = math.prod(fator - 1 for fator in fatores)
+
+                self._e = ParDeChaves.melhor_e(self.phi_n)
+                if self.e is not None:
+                    break
+                fatores[-1] = busca.gerar(tamanhos[-1])[0]
+
+        p, q = fatores[:2]
+        self._n = math.prod(fatores)
         self._d = sympy.mod_inverse(self.e, self.phi_n)
+        self._p = p
+        self._q = q
+        self._dp = self.d % (p - 1)
+        self._dq = self.d % (q - 1)
+        self._qinv = sympy.mod_inverse(q, p)
+        self._outros_primos = None
+        if len(fatores) > 2:
+            # Coeficientes de Garner para os primos adicionais (RFC 8017, seção 3.2)
+            self._outros_primos = []
+            produto = p * q
+            for r in fatores[2:]:
+                self._outros_primos.append({'r': r,
+                                            'd': self.d % (r - 1),
+                                            't': sympy.mod_inverse(produto % r, r)})
+                produto *= r
+        self._has_private = True
+        self._has_public = True
+        return self.emitir(issued_to=issued_to, issued_at=issued_at)
+
+    def emitir(self,
+               issued_to: str = None,
+               issued_at: datetime = None) -> bool:
+        """
+        Emite um par de chaves já gerado: atribui um novo número de série, o
+         proprietário e a data de emissão.
+
+        Args:
+            issued_to (str): O proprietário da chave.
+            issued_at (datetime): A data e hora de emissão da chave. Se None, a data e hora
+            atuais serão usadas.
+
+        Returns:
+            bool: True se o par foi emitido, False se não houver um par completo.
+        """
+        if not (self.has_private and self.has_public):
+            return False
+        self._serializado = {}
         self._issued_to = issued_to
         if issued_at is None or not isinstance(issued_at, datetime):
             self._issued_at = datetime.now(timezone.utc).replace(microsecond=0)
         else:
             self._issued_at = issued_at
         self._serial = str(uuid.uuid4())
-        self._has_private = True
-        self._has_public = True
         return True
 
-    def public(self, armored: bool = False) -> Union[ChavePublica, str]:
+    def public(self, armored: bool = False, binario: bool = False) -> Union[ChavePublica, str, bytes]:
         """
         Retorna a chave pública.
 
+        As formas serializadas são memorizadas no par de chaves e só são
+         refeitas quando a chave muda.
+
         Args:
             armored (bool): Indica se a chave deve ser retornada em formato armored. Padrão é False.
+            binario (bool): Indica se a chave deve ser serializada no formato binário compacto
+            (ver assimetrica.binario). Com armored, o formato binário é envolvido pelos banners.
+            Padrão é False.
 
         Returns:
-            Union[ChavePublica, str]: A chave pública em formato ChavePublica ou string se
-            armored for True.
+            Union[ChavePublica, str, bytes]: A chave pública em formato ChavePublica, string se
+            armored for True ou bytes se apenas binario for True.
         """
         chave = ChavePublica(issued_at=self.issued_at,
                              issued_to=self.issued_to,
@@ -649,55 +1329,84 @@ class ParDeChaves:
                              size=self.size,
                              n=self.n,
                              e=self.e)
-        if not armored:
+        if not armored and not binario:
             return chave
-        chave = json.dumps(chave.__dict__, cls=CustomJSONEncoder)
-        return Ferramental.armored(
-                base_bytes=chave.encode('utf-8'),
-                service="public key",
-                width=72)
+        return self._serializar(chave, "public key", armored, binario)
 
-    def private(self, armored: bool = False) -> Union[ChavePrivada, str]:
+    def private(self, armored: bool = False, binario: bool = False) -> Union[ChavePrivada, str, bytes]:
         """
         Retorna a chave privada.
 
+        As formas serializadas são memorizadas no par de chaves e só são
+         refeitas quando a chave muda.
+
         Args:
             armored (bool): Indica se a chave deve ser retornada em formato armored. Padrão é False.
+            binario (bool): Indica se a chave deve ser serializada no formato binário compacto
+            (ver assimetrica.binario). Com armored, o formato binário é envolvido pelos banners.
+            Padrão é False.
 
         Returns:
-            Union[ChavePrivada, str]: A chave privada em formato ChavePrivada ou string se
-            armored for True.
+            Union[ChavePrivada, str, bytes]: A chave privada em formato ChavePrivada, string se
+            armored for True ou bytes se apenas binario for True.
         """
         chave = ChavePrivada(issued_at=self.issued_at,
                              issued_to=self.issued_to,
                              serial=self.serial,
                              size=self.size,
                              n=self.n,
-                             d=self.d)
-        if not armored:
+                             d=self.d,
+                             p=self.p,
+                             q=self.q,
+                             dp=self.dp,
+                             dq=self.dq,
+                             qinv=self.qinv,
+                             outros_primos=self.outros_primos)
+        if not armored and not binario:
             return chave
-        chave = json.dumps(chave.__dict__, cls=CustomJSONEncoder)
-        return Ferramental.armored(
-                base_bytes=chave.encode('utf-8'),
-                service="private key",
-                width=72)
+        return self._serializar(chave, "private key", armored, binario)
+
+    def _serializar(self, chave: Chave, service: str, armored: bool, binario: bool) -> Union[str, bytes]:
+        memo = (service, armored, binario)
+        if memo in self._serializado:
+            return self._serializado[memo]
+        if binario:
+            tipo = formato_binario.CHAVE_PRIVADA if isinstance(chave, ChavePrivada) \
+                else formato_binario.CHAVE_PUBLICA
+            serializado = formato_binario.codificar_chave(chave.__dict__, tipo)
+        else:
+            dados = dict(chave.__dict__)
+            if dados.get('outros_primos', 0) is None:  # Chaves com dois primos mantêm o formato original
+                del dados['outros_primos']
+            serializado = json.dumps(dados, cls=CustomJSONEncoder).encode('utf-8')
+        if armored and serializado is not None:
+            serializado = Ferramental.armored(
+                    base_bytes=serializado,
+                    service=service,
+                    width=72)
+        self._serializado[memo] = serializado
+        return serializado
 
     def load_key(self,
-                 chave: Union[Chave, str] = None,
+                 chave: Union[Chave, str, bytes] = None,
                  tipo: TipoChave = None) -> bool:
         """
         Carrega uma chave pública ou privada.
 
         Args:
-            chave (Union[Chave, str]): A chave a ser carregada, que pode ser um objeto Chave ou
-            uma string.
+            chave (Union[Chave, str, bytes]): A chave a ser carregada, que pode ser um objeto
+            Chave, uma string armored (JSON ou binária) ou bytes no formato binário.
             tipo (TipoChave): O tipo da chave (PUBLICA ou PRIVADA) se a chave for uma string.
+            Para chaves binárias é opcional, e se informado precisa coincidir.
 
         Returns:
             bool: True se a chave for carregada com sucesso, False caso contrário.
         """
         if chave is None:
             return False
+        self._serializado = {}
+        if formato_binario.eh_chave_binaria(chave):
+            return self._load_binary_key(chave, tipo)
         if isinstance(chave, Chave):  # Carregar dados comuns aos dois tipos de chave
             if not self._same_base_metadata(chave):
                 return False
@@ -708,6 +1417,13 @@ class ParDeChaves:
             self._n = chave.n
         if isinstance(chave, ChavePrivada):  # Carregar chave privada
             self._d = chave.d
+            self._p = chave.p
+            self._q = chave.q
+            self._dp = chave.dp
+            self._dq = chave.dq
+            self._qinv = chave.qinv
+            self._outros_primos = chave.outros_primos
+            self._descartar_crt_inconsistente()
             self._has_private = True
             return True
         if isinstance(chave, ChavePublica):  # Carregar chave publica
@@ -735,13 +1451,16 @@ class ParDeChaves:
         base_str = ''.join(lines[start_idx + 1:end_idx])
         del lines
         try:
-            chave = json.loads(base64.b64decode(base_str.encode('utf-8')).decode('utf-8'))
+            chave = base64.b64decode(base_str.encode('utf-8'))
+            if formato_binario.eh_chave_binaria(chave):
+                return self._load_binary_key(chave, tipo)
+            chave = json.loads(chave.decode('utf-8'))
         except (binascii.Error, ValueError):
             return False
         self._issued_to = chave.get('issued_to')
         self._issued_at = Ferramental.safe_fromisoformat(chave.get('issued_at'))
         self._serial = chave.get('serial')
-        self._size = chave.get('bits')
+        self._size = chave.get('size', chave.get('bits'))
         self._n = chave.get('n')
         if self.n is None:
             return False  # Faltando N não tem chave
@@ -749,6 +1468,14 @@ class ParDeChaves:
             self._d = chave.get('d')
             if self.d is None:  # Faltando D não tem chave privada
                 return False
+            # Parâmetros do TCR são opcionais: chaves antigas não os possuem
+            self._p = chave.get('p')
+            self._q = chave.get('q')
+            self._dp = chave.get('dp')
+            self._dq = chave.get('dq')
+            self._qinv = chave.get('qinv')
+            self._outros_primos = chave.get('outros_primos')
+            self._descartar_crt_inconsistente()
             self._has_private = True
         else:
             self._e = chave.get('e')
@@ -757,6 +1484,19 @@ class ParDeChaves:
             self._has_public = True
         return True
 
+    def _load_binary_key(self, dados: bytes, tipo: TipoChave = None) -> bool:
+        decodificado = formato_binario.decodificar_chave(dados)
+        if decodificado is None:
+            return False
+        tipo_binario, campos = decodificado
+        if tipo_binario == formato_binario.CHAVE_PRIVADA:
+            if tipo not in (None, TipoChave.PRIVADA) or campos['n'] is None or campos['d'] is None:
+                return False
+            return self.load_key(ChavePrivada(**campos))
+        if tipo not in (None, TipoChave.PUBLICA) or campos['n'] is None or campos['e'] is None:
+            return False
+        return self.load_key(ChavePublica(**campos))
+
 
 if __name__ == '__main__':
     chaves = ParDeChaves()
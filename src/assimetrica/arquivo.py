@@ -0,0 +1,158 @@
+import mmap
+import os
+from concurrent.futures import Executor
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+from src.assimetrica import ChavePrivada, ChavePublica, Mensagem, resumo as resumos
+
+# Tamanho das leituras (ou das fatias do mmap) entregues ao resumo
+TAMANHO_BLOCO = 1024 * 1024
+
+Arquivo = Union[str, bytes, os.PathLike, BinaryIO]
+
+
+def resumir_arquivo(arquivo: Arquivo,
+                    tamanho_bloco: int = TAMANHO_BLOCO,
+                    usar_mmap: bool = False,
+                    algoritmo: str = resumos.PADRAO,
+                    folha: int = None,
+                    executor: Executor = None) -> bytes:
+    """
+    Calcula o resumo de um arquivo sem carregá-lo inteiro na memória.
+
+    Por padrão o arquivo é lido em blocos de `tamanho_bloco` bytes num único
+     buffer reaproveitado. Com usar_mmap, o arquivo é mapeado e resumido em
+     fatias do mapeamento, sem cópias; arquivos vazios ou que não podem ser
+     mapeados são lidos em blocos. No modo árvore os blocos são as folhas.
+
+    Args:
+        arquivo (Union[str, bytes, os.PathLike, BinaryIO]): O caminho do arquivo ou um
+        arquivo binário aberto, lido a partir da posição atual.
+        tamanho_bloco (int): O tamanho de cada leitura em bytes. Padrão é 1 MiB.
+        usar_mmap (bool): Indica se o arquivo deve ser mapeado na memória. Padrão é False.
+        algoritmo (str): sha256, sha512 ou blake2b. Padrão é sha256.
+        folha (int, opcional): Se informado, usa o resumo em árvore com folhas desse
+        tamanho (ver assimetrica.resumo).
+        executor (Executor, opcional): O executor das folhas no modo árvore.
+
+    Returns:
+        bytes: O resumo do conteúdo.
+    """
+    if tamanho_bloco < 1:
+        raise ValueError('tamanho_bloco must be at least 1')
+    resumos.validar(algoritmo, folha)
+    if isinstance(arquivo, (str, bytes, os.PathLike)):
+        with open(arquivo, 'rb') as aberto:
+            return resumir_arquivo(aberto, tamanho_bloco, usar_mmap, algoritmo, folha, executor)
+    if folha is not None:
+        return _resumir_arvore(arquivo, usar_mmap, algoritmo, folha, executor)
+    resumo = resumos.ALGORITMOS[algoritmo]()
+    if usar_mmap:
+        try:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):  # Sem descritor, vazio ou não mapeável
+            mapa = None
+        if mapa is not None:
+            with mapa, memoryview(mapa) as visao:
+                for inicio in range(arquivo.tell(), len(visao), tamanho_bloco):
+                    resumo.update(visao[inicio:inicio + tamanho_bloco])
+            return resumo.digest()
+    buffer = bytearray(tamanho_bloco)
+    with memoryview(buffer) as visao:
+        while True:
+            lidos = arquivo.readinto(visao)
+            if not lidos:
+                break
+            resumo.update(visao[:lidos])
+    return resumo.digest()
+
+
+def _resumir_arvore(arquivo: BinaryIO,
+                    usar_mmap: bool,
+                    algoritmo: str,
+                    folha: int,
+                    executor: Optional[Executor]) -> bytes:
+    if usar_mmap:
+        try:
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            mapa = None
+        if mapa is not None:
+            with mapa, memoryview(mapa) as visao:
+                folhas = (visao[i:i + folha] for i in range(arquivo.tell(), len(visao), folha))
+                resumo = resumos.resumir_folhas(folhas, algoritmo, folha, executor)
+                del folhas
+                return resumo
+    # Cada folha é lida num bytes próprio, pois fica em uso numa thread do executor
+    return resumos.resumir_folhas(iter(lambda: arquivo.read(folha), b''), algoritmo, folha, executor)
+
+
+def assinar_arquivo(arquivo: Arquivo,
+                    chave: ChavePrivada,
+                    armored: bool = True,
+                    versao: int = None,
+                    binario: bool = False,
+                    usar_mmap: bool = False,
+                    algoritmo: str = resumos.PADRAO,
+                    folha: int = None,
+                    executor: Executor = None) -> Optional[Union[str, bytes, Dict[str, Any]]]:
+    """
+    Assina um arquivo sem carregá-lo numa Mensagem.
+
+    A assinatura tem exatamente o formato de Mensagem.assinar sobre o mesmo
+     conteúdo, e pode ser verificada por qualquer uma das duas vias.
+
+    Args:
+        arquivo (Union[str, bytes, os.PathLike, BinaryIO]): O caminho do arquivo ou um
+        arquivo binário aberto.
+        chave (ChavePrivada): A chave privada usada para assinar.
+        armored (bool): Indica se a assinatura deve ser retornada em formato armored. Padrão
+        é True.
+        versao (int): O formato da assinatura, como em Mensagem.assinar.
+        binario (bool): Indica se a assinatura deve ser retornada no formato binário
+        compacto. Padrão é False.
+        usar_mmap (bool): Indica se o arquivo deve ser mapeado na memória. Padrão é False.
+        algoritmo (str): O algoritmo do resumo, como em Mensagem.assinar.
+        folha (int, opcional): O tamanho das folhas do resumo em árvore, como em
+        Mensagem.assinar.
+        executor (Executor, opcional): O executor das folhas no modo árvore.
+
+    Returns:
+        Optional[Union[str, bytes, Dict[str, Any]]]: A assinatura, como em Mensagem.assinar.
+    """
+    try:
+        resumo = resumir_arquivo(arquivo, usar_mmap=usar_mmap, algoritmo=algoritmo, folha=folha, executor=executor)
+    except ValueError:
+        return None
+    return Mensagem._assinar_resumo(resumo, chave, armored, versao, binario, algoritmo, folha)
+
+
+def verificar_assinatura_arquivo(arquivo: Arquivo,
+                                 chave: ChavePublica,
+                                 assinatura: Union[str, bytes, Dict[str, Any]],
+                                 usar_mmap: bool = False,
+                                 executor: Executor = None) -> Optional[Dict[str, Any]]:
+    """
+    Verifica a assinatura de um arquivo sem carregá-lo numa Mensagem.
+
+    Args:
+        arquivo (Union[str, bytes, os.PathLike, BinaryIO]): O caminho do arquivo ou um
+        arquivo binário aberto.
+        chave (ChavePublica): A chave pública usada para verificar a assinatura.
+        assinatura (Union[str, bytes, Dict[str, Any]]): A assinatura, como em
+        Mensagem.verificar_assinatura.
+        usar_mmap (bool): Indica se o arquivo deve ser mapeado na memória. Padrão é False.
+        executor (Executor, opcional): O executor das folhas, se a assinatura usar o resumo
+        em árvore.
+
+    Returns:
+        Optional[Dict[str, Any]]: O resultado no formato de Mensagem.verificar_assinatura.
+    """
+    return Mensagem._verificar_resumo(
+            lambda algoritmo, folha: resumir_arquivo(arquivo,
+                                                     usar_mmap=usar_mmap,
+                                                     algoritmo=algoritmo,
+                                                     folha=folha,
+                                                     executor=executor),
+            chave,
+            assinatura)
@@ -0,0 +1,365 @@
+import struct
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+
+from src.assimetrica import resumo as resumos
+
+# Formato binário de mensagens cifradas e assinaturas
+#
+#   cabeçalho (big-endian, 38 bytes):
+#     magic         2s  b'SD'
+#     formato       B   versão do formato binário (1)
+#     tipo          B   TIPO_MENSAGEM ou TIPO_ASSINATURA
+#     flags         B   FLAG_CRC | FLAG_PADDING | FLAG_ENVELOPE
+#     padding       B   o byte de padding dos chunks; em assinaturas, o código do
+#                       algoritmo do resumo nos 4 bits baixos e, no modo árvore,
+#                       log2(folha) - 9 nos 4 bits altos
+#     key_serial    16s o UUID da chave em bytes
+#     generated_at  q   segundos desde a época (UTC)
+#     version       B   a versão da assinatura (0 em mensagens)
+#     largura       H   bytes por chunk (tamanho de n em bytes)
+#     quantidade    I   número de chunks
+#   chunks: quantidade * largura bytes, inteiros big-endian de largura fixa
+#   extra (4 bytes de tamanho + dados): o payload Fernet em mensagens
+#     envelope, o issued_to (UTF-8) em assinaturas
+
+MAGIC = b'SD'
+FORMATO = 1
+TIPO_MENSAGEM = 0
+TIPO_ASSINATURA = 1
+FLAG_CRC = 0x01
+FLAG_PADDING = 0x02
+FLAG_ENVELOPE = 0x04
+
+_CABECALHO = struct.Struct('>2sBBBB16sqBHI')
+_TAMANHO_EXTRA = struct.Struct('>I')
+
+
+def eh_binario(dados: Any) -> bool:
+    """
+    Indica se um objeto parece estar no formato binário.
+
+    Args:
+        dados (Any): O objeto a verificar.
+
+    Returns:
+        bool: True se for bytes-like e começar com o magic do formato.
+    """
+    return isinstance(dados, (bytes, bytearray, memoryview)) and bytes(dados[:2]) == MAGIC
+
+
+def _serial_para_bytes(serial: Optional[str]) -> bytes:
+    return bytes(16) if serial is None else uuid.UUID(serial).bytes
+
+
+def _bytes_para_serial(dados: bytes) -> Optional[str]:
+    return None if dados == bytes(16) else str(uuid.UUID(bytes=dados))
+
+
+def _codificar_resumo(algoritmo: str, folha: Optional[int]) -> Optional[int]:
+    try:
+        resumos.validar(algoritmo, folha)
+    except (TypeError, ValueError):
+        return None
+    codigo = resumos.CODIGOS[algoritmo]
+    if folha is not None:
+        codigo |= (folha.bit_length() - 10) << 4
+    return codigo
+
+
+def _decodificar_resumo(codigo: int) -> Optional[Tuple[str, Optional[int]]]:
+    nomes = {valor: nome for nome, valor in resumos.CODIGOS.items()}
+    if codigo & 0x0F not in nomes:
+        return None
+    return nomes[codigo & 0x0F], (1 << ((codigo >> 4) + 9)) if codigo >> 4 else None
+
+
+def codificar(dados: Dict[str, Any], largura: int, tipo: int = TIPO_MENSAGEM) -> Optional[bytes]:
+    """
+    Codifica o dicionário de uma mensagem cifrada ou assinatura no formato
+     binário.
+
+    Args:
+        dados (Dict[str, Any]): O dicionário produzido por Mensagem.cifrar ou Mensagem.assinar.
+        largura (int): O tamanho de cada chunk em bytes, normalmente o tamanho de n.
+        tipo (int): TIPO_MENSAGEM ou TIPO_ASSINATURA. Padrão é TIPO_MENSAGEM.
+
+    Returns:
+        Optional[bytes]: Os bytes codificados ou None se algum campo não couber no formato.
+    """
+    flags = 0
+    if dados.get('has_crc', True):
+        flags |= FLAG_CRC
+    if dados.get('has_padding', True):
+        flags |= FLAG_PADDING
+    if dados.get('envelope', False):
+        flags |= FLAG_ENVELOPE
+    padding = (dados.get('padding') or b'\x00')[0]
+    if tipo == TIPO_ASSINATURA:
+        padding = _codificar_resumo(dados.get('digest', resumos.PADRAO), dados.get('tree_leaf'))
+        if padding is None:
+            return None
+    generated_at = dados.get('generated_at')
+    chunks = dados.get('chunks') or []
+    if tipo == TIPO_ASSINATURA:
+        extra = (dados.get('issued_to') or '').encode('utf-8')
+    else:
+        extra = (dados.get('payload') or '').encode('utf-8')
+    try:
+        cabecalho = _CABECALHO.pack(MAGIC,
+                                    FORMATO,
+                                    tipo,
+                                    flags,
+                                    padding,
+                                    _serial_para_bytes(dados.get('key_serial')),
+                                    int(generated_at.timestamp()) if generated_at else 0,
+                                    dados.get('version', 0) if tipo == TIPO_ASSINATURA else 0,
+                                    largura,
+                                    len(chunks))
+        corpo = b''.join(chunk.to_bytes(largura, byteorder='big') for chunk in chunks)
+    except (struct.error, OverflowError, ValueError, AttributeError):
+        return None
+    return cabecalho + corpo + _TAMANHO_EXTRA.pack(len(extra)) + extra
+
+
+def decodificar(dados: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[int, Dict[str, Any]]]:
+    """
+    Decodifica uma mensagem cifrada ou assinatura no formato binário.
+
+    Args:
+        dados (Union[bytes, bytearray, memoryview]): Os bytes codificados.
+
+    Returns:
+        Optional[Tuple[int, Dict[str, Any]]]: O tipo (TIPO_MENSAGEM ou TIPO_ASSINATURA) e o
+        dicionário equivalente ao produzido por Mensagem.cifrar ou Mensagem.assinar, ou None
+        se os bytes estiverem malformados.
+    """
+    dados = memoryview(dados)
+    try:
+        (magic, formato, tipo, flags, padding, serial,
+         generated_at, versao, largura, quantidade) = _CABECALHO.unpack_from(dados)
+    except struct.error:
+        return None
+    if magic != MAGIC or formato != FORMATO or tipo not in (TIPO_MENSAGEM, TIPO_ASSINATURA):
+        return None
+    inicio = _CABECALHO.size
+    fim = inicio + largura * quantidade
+    if largura < 1 or len(dados) < fim + _TAMANHO_EXTRA.size:
+        return None
+    (tamanho_extra,) = _TAMANHO_EXTRA.unpack_from(dados, fim)
+    extra = bytes(dados[fim + _TAMANHO_EXTRA.size:fim + _TAMANHO_EXTRA.size + tamanho_extra])
+    if len(extra) != tamanho_extra:
+        return None
+    try:
+        extra = extra.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    conteudo = {
+        'key_serial'  : _bytes_para_serial(bytes(serial)),
+        'has_crc'     : bool(flags & FLAG_CRC),
+        'has_padding' : bool(flags & FLAG_PADDING),
+        'generated_at': datetime.fromtimestamp(generated_at, timezone.utc) if generated_at else None,
+        'chunks'      : [int.from_bytes(dados[i:i + largura], byteorder='big')
+                         for i in range(inicio, fim, largura)],
+    }
+    if tipo == TIPO_ASSINATURA:
+        algoritmo = _decodificar_resumo(padding)
+        if algoritmo is None:
+            return None
+        conteudo['digest'], folha = algoritmo
+        if folha is not None:
+            conteudo['tree_leaf'] = folha
+    elif conteudo['has_padding']:
+        conteudo['padding'] = bytes([padding])
+    if tipo == TIPO_ASSINATURA:
+        conteudo['version'] = versao
+        conteudo['issued_to'] = extra or None
+    elif flags & FLAG_ENVELOPE:
+        conteudo['envelope'] = True
+        conteudo['payload'] = extra
+    return tipo, conteudo
+
+
+# Formato binário de chaves
+#
+#   cabeçalho (big-endian, 32 bytes):
+#     magic         2s  b'SK'
+#     formato       B   versão do formato binário (1)
+#     tipo          B   CHAVE_PUBLICA ou CHAVE_PRIVADA
+#     serial        16s o UUID da chave em bytes
+#     issued_at     q   segundos desde a época (UTC)
+#     size          I   o tamanho da chave em bits (0 se desconhecido)
+#   issued_to: 4 bytes de tamanho + UTF-8 (tamanho 0 se ausente)
+#   inteiros, cada um com 4 bytes de tamanho + big-endian (tamanho 0 se None):
+#     pública: n, e
+#     privada: n, d, p, q, dp, dq, qinv, seguidos de 1 byte com a quantidade
+#              de primos adicionais e, para cada um, r, d e t
+
+MAGIC_CHAVE = b'SK'
+CHAVE_PUBLICA = 0
+CHAVE_PRIVADA = 1
+
+_CABECALHO_CHAVE = struct.Struct('>2sBB16sqI')
+_CAMPOS_PUBLICA = ('n', 'e')
+_CAMPOS_PRIVADA = ('n', 'd', 'p', 'q', 'dp', 'dq', 'qinv')
+
+
+def eh_chave_binaria(dados: Any) -> bool:
+    """
+    Indica se um objeto parece ser uma chave no formato binário.
+
+    Args:
+        dados (Any): O objeto a verificar.
+
+    Returns:
+        bool: True se for bytes-like e começar com o magic das chaves.
+    """
+    return isinstance(dados, (bytes, bytearray, memoryview)) and bytes(dados[:2]) == MAGIC_CHAVE
+
+
+def _campo(dados: bytes) -> bytes:
+    return _TAMANHO_EXTRA.pack(len(dados)) + dados
+
+
+def _inteiro(valor: Optional[int]) -> bytes:
+    if valor is None:
+        return _campo(b'')
+    return _campo(valor.to_bytes(max(1, (valor.bit_length() + 7) // 8), byteorder='big'))
+
+
+def codificar_chave(campos: Dict[str, Any], tipo: int = CHAVE_PUBLICA) -> Optional[bytes]:
+    """
+    Codifica os campos de uma chave no formato binário.
+
+    Args:
+        campos (Dict[str, Any]): Os campos da ChavePublica ou ChavePrivada.
+        tipo (int): CHAVE_PUBLICA ou CHAVE_PRIVADA. Padrão é CHAVE_PUBLICA.
+
+    Returns:
+        Optional[bytes]: Os bytes codificados ou None se algum campo não couber no formato.
+    """
+    issued_at = campos.get('issued_at')
+    try:
+        partes = [_CABECALHO_CHAVE.pack(MAGIC_CHAVE,
+                                        FORMATO,
+                                        tipo,
+                                        _serial_para_bytes(campos.get('serial')),
+                                        int(issued_at.timestamp()) if issued_at else 0,
+                                        campos.get('size') or 0),
+                  _campo((campos.get('issued_to') or '').encode('utf-8'))]
+        for nome in (_CAMPOS_PRIVADA if tipo == CHAVE_PRIVADA else _CAMPOS_PUBLICA):
+            partes.append(_inteiro(campos.get(nome)))
+        if tipo == CHAVE_PRIVADA:
+            outros = campos.get('outros_primos') or []
+            partes.append(struct.pack('>B', len(outros)))
+            for primo in outros:
+                partes += [_inteiro(primo['r']), _inteiro(primo['d']), _inteiro(primo['t'])]
+    except (struct.error, OverflowError, ValueError, AttributeError, KeyError):
+        return None
+    return b''.join(partes)
+
+
+def ler_metadados_chave(dados: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[int, Dict[str, Any], int]]:
+    """
+    Lê apenas o cabeçalho e o issued_to de uma chave no formato binário.
+
+    Args:
+        dados (Union[bytes, bytearray, memoryview]): Os bytes codificados.
+
+    Returns:
+        Optional[Tuple[int, Dict[str, Any], int]]: O tipo, um dicionário com serial,
+        issued_at, issued_to e size, e a posição onde começam os inteiros; ou None se os
+        bytes estiverem malformados.
+    """
+    dados = memoryview(dados)
+    try:
+        magic, formato, tipo, serial, issued_at, size = _CABECALHO_CHAVE.unpack_from(dados)
+        (tamanho,) = _TAMANHO_EXTRA.unpack_from(dados, _CABECALHO_CHAVE.size)
+    except struct.error:
+        return None
+    if magic != MAGIC_CHAVE or formato != FORMATO or tipo not in (CHAVE_PUBLICA, CHAVE_PRIVADA):
+        return None
+    inicio = _CABECALHO_CHAVE.size + _TAMANHO_EXTRA.size
+    issued_to = bytes(dados[inicio:inicio + tamanho])
+    if len(issued_to) != tamanho:
+        return None
+    try:
+        issued_to = issued_to.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    metadados = {
+        'serial'   : _bytes_para_serial(bytes(serial)),
+        'issued_at': datetime.fromtimestamp(issued_at, timezone.utc) if issued_at else None,
+        'issued_to': issued_to or None,
+        'size'     : size or None,
+    }
+    return tipo, metadados, inicio + tamanho
+
+
+def _ler_inteiro(dados: memoryview, posicao: int) -> Tuple[Optional[int], int]:
+    (tamanho,) = _TAMANHO_EXTRA.unpack_from(dados, posicao)
+    posicao += _TAMANHO_EXTRA.size
+    if posicao + tamanho > len(dados):
+        raise ValueError('truncated key')
+    if tamanho == 0:
+        return None, posicao
+    return int.from_bytes(dados[posicao:posicao + tamanho], byteorder='big'), posicao + tamanho
+
+
+def ler_inteiros_chave(dados: Union[bytes, bytearray, memoryview],
+                       tipo: int,
+                       posicao: int) -> Optional[Dict[str, Any]]:
+    """
+    Lê os inteiros de uma chave no formato binário, a partir da posição
+     devolvida por ler_metadados_chave.
+
+    Args:
+        dados (Union[bytes, bytearray, memoryview]): Os bytes codificados.
+        tipo (int): CHAVE_PUBLICA ou CHAVE_PRIVADA.
+        posicao (int): A posição onde começam os inteiros.
+
+    Returns:
+        Optional[Dict[str, Any]]: Os inteiros da chave (e outros_primos, nas privadas), ou
+        None se os bytes estiverem malformados.
+    """
+    dados = memoryview(dados)
+    campos = {}
+    try:
+        for nome in (_CAMPOS_PRIVADA if tipo == CHAVE_PRIVADA else _CAMPOS_PUBLICA):
+            campos[nome], posicao = _ler_inteiro(dados, posicao)
+        if tipo == CHAVE_PRIVADA:
+            (quantidade,) = struct.unpack_from('>B', dados, posicao)
+            posicao += 1
+            outros = []
+            for _ in range(quantidade):
+                r, posicao = _ler_inteiro(dados, posicao)
+                d, posicao = _ler_inteiro(dados, posicao)
+                t, posicao = _ler_inteiro(dados, posicao)
+                outros.append({'r': r, 'd': d, 't': t})
+            campos['outros_primos'] = outros or None
+    except (struct.error, ValueError):
+        return None
+    return campos
+
+
+def decodificar_chave(dados: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[int, Dict[str, Any]]]:
+    """
+    Decodifica uma chave no formato binário.
+
+    Args:
+        dados (Union[bytes, bytearray, memoryview]): Os bytes codificados.
+
+    Returns:
+        Optional[Tuple[int, Dict[str, Any]]]: O tipo (CHAVE_PUBLICA ou CHAVE_PRIVADA) e os
+        campos da chave, ou None se os bytes estiverem malformados.
+    """
+    lido = ler_metadados_chave(dados)
+    if lido is None:
+        return None
+    tipo, campos, posicao = lido
+    inteiros = ler_inteiros_chave(dados, tipo, posicao)
+    if inteiros is None:
+        return None
+    campos.update(inteiros)
+    return tipo, campos
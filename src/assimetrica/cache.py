@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from src.assimetrica import ChavePublica, ParDeChaves, TipoChave
+
+
+class CacheDeChaves:
+    """
+    Cache LRU de chaves públicas já carregadas, indexado pelo serial.
+
+    Evita repetir o trabalho de ParDeChaves.load_key (busca dos banners,
+     base64, JSON e datas) para chaves que aparecem repetidamente. As entradas
+     podem expirar após `ttl` segundos; quando a capacidade é atingida, a
+     entrada usada há mais tempo é descartada.
+
+    Atributos:
+        _capacidade (int): O número máximo de chaves mantidas.
+        _ttl (float): O tempo de vida das entradas em segundos, ou None.
+        _buscar (Callable): Função opcional que obtém a chave de um serial ausente, como
+            ChavePublica, forma armored ou formato binário.
+        _entradas (OrderedDict): serial -> (chave, instante de inserção, armored ou None).
+        _por_armored (Dict[Union[str, bytes], str]): Forma armored (ou binária) -> serial.
+        _lock (threading.Lock): Protege o estado.
+        _acertos (int): Quantidade de consultas atendidas pelo cache.
+        _falhas (int): Quantidade de consultas não atendidas pelo cache.
+        _despejos (int): Quantidade de entradas descartadas por capacidade ou TTL.
+    """
+
+    def __init__(self,
+                 capacidade: int = 4096,
+                 ttl: float = None,
+                 buscar: Callable[[str], Optional[Union[ChavePublica, str, bytes]]] = None):
+        if capacidade < 1:
+            raise ValueError('capacidade must be at least 1')
+        self._capacidade = capacidade
+        self._ttl = ttl
+        self._buscar = buscar
+        self._entradas: OrderedDict[str, Tuple[ChavePublica, float, Optional[str]]] = OrderedDict()
+        self._por_armored: Dict[Union[str, bytes], str] = {}
+        self._lock = threading.Lock()
+        self._acertos = 0
+        self._falhas = 0
+        self._despejos = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+    @property
+    def acertos(self) -> int:
+        return self._acertos
+
+    @property
+    def falhas(self) -> int:
+        return self._falhas
+
+    @property
+    def despejos(self) -> int:
+        return self._despejos
+
+    def obter(self, serial: str) -> Optional[ChavePublica]:
+        """
+        Retorna a chave pública de um serial.
+
+        Se o serial não estiver no cache e houver uma função de busca, a chave
+         obtida é carregada e armazenada, desde que o seu serial seja o pedido.
+
+        Args:
+            serial (str): O serial da chave.
+
+        Returns:
+            Optional[ChavePublica]: A chave ou None se não for encontrada.
+        """
+        with self._lock:
+            chave = self._consultar(serial)
+            if chave is not None:
+                self._acertos += 1
+                return chave
+            self._falhas += 1
+        if self._buscar is None:
+            return None
+        encontrada = self._buscar(serial)
+        if isinstance(encontrada, (str, bytes)):
+            return self._carregar(encontrada, serial)
+        if isinstance(encontrada, ChavePublica) and encontrada.serial == serial:
+            self.adicionar(encontrada)
+            return encontrada
+        return None
+
+    def carregar(self, armored: str) -> Optional[ChavePublica]:
+        """
+        Retorna a chave pública de uma forma armored, carregando-a só na
+         primeira vez.
+
+        Args:
+            armored (str): A chave pública armored.
+
+        Returns:
+            Optional[ChavePublica]: A chave ou None se a forma armored for inválida.
+        """
+        with self._lock:
+            serial = self._por_armored.get(armored)
+            chave = self._consultar(serial) if serial is not None else None
+            if chave is not None:
+                self._acertos += 1
+                return chave
+            self._falhas += 1
+        return self._carregar(armored)
+
+    def adicionar(self, chave: ChavePublica, armored: str = None) -> bool:
+        """
+        Armazena uma chave pública já carregada.
+
+        Args:
+            chave (ChavePublica): A chave.
+            armored (str, opcional): A forma armored da chave, para consultas por carregar.
+
+        Returns:
+            bool: True se a chave foi armazenada, False se não tiver serial.
+        """
+        if chave is None or chave.serial is None:
+            return False
+        with self._lock:
+            self._remover(chave.serial)
+            self._entradas[chave.serial] = (chave, time.monotonic(), armored)
+            if armored is not None:
+                self._por_armored[armored] = chave.serial
+            while len(self._entradas) > self._capacidade:
+                self._remover(next(iter(self._entradas)))
+                self._despejos += 1
+        return True
+
+    def invalidar(self, serial: str) -> bool:
+        """
+        Remove a chave de um serial.
+
+        Args:
+            serial (str): O serial da chave.
+
+        Returns:
+            bool: True se havia uma chave com esse serial, False caso contrário.
+        """
+        with self._lock:
+            return self._remover(serial)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._por_armored.clear()
+
+    def _carregar(self, armored: Union[str, bytes], serial: str = None) -> Optional[ChavePublica]:
+        chaves = ParDeChaves()
+        if not chaves.load_key(armored, TipoChave.PUBLICA):
+            return None
+        chave = chaves.public()
+        if serial is not None and chave.serial != serial:
+            # A busca devolveu a chave de outro serial: não pode ocupar a entrada pedida
+            return None
+        self.adicionar(chave, armored)
+        return chave
+
+    def _consultar(self, serial: str) -> Optional[ChavePublica]:
+        # Chamado com o lock adquirido
+        entrada = self._entradas.get(serial)
+        if entrada is None:
+            return None
+        chave, inserida, _ = entrada
+        if self._ttl is not None and time.monotonic() - inserida > self._ttl:
+            self._remover(serial)
+            self._despejos += 1
+            return None
+        self._entradas.move_to_end(serial)
+        return chave
+
+    def _remover(self, serial: str) -> bool:
+        # Chamado com o lock adquirido
+        entrada = self._entradas.pop(serial, None)
+        if entrada is None:
+            return False
+        if entrada[2] is not None:
+            self._por_armored.pop(entrada[2], None)
+        return True
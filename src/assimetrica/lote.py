@@ -0,0 +1,138 @@
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.assimetrica import ChavePublica, Mensagem, ParDeChaves, TipoChave, exponenciar_chunks
+
+# Uma chave pública, sua forma armored, ou uma função que recebe o serial e
+# devolve uma das duas (ou None se o serial for desconhecido)
+FonteDeChave = Union[ChavePublica, str, Callable[[str], Optional[Union[ChavePublica, str]]]]
+
+# Falhas causadas pelo conteúdo de um registro malformado, que invalidam só
+# aquele registro
+_ERROS_DE_REGISTRO = (TypeError, ValueError, OverflowError, AttributeError, KeyError)
+
+
+def _carregar_chave(chave: Union[ChavePublica, str, None]) -> Optional[ChavePublica]:
+    if chave is None or isinstance(chave, ChavePublica):
+        return chave
+    chaves = ParDeChaves()
+    if not chaves.load_key(chave, TipoChave.PUBLICA):
+        return None
+    return chaves.public()
+
+
+class _ResolvedorDeChaves:
+    """
+    Resolve e memoriza as chaves públicas de um lote, de modo que cada chave
+     seja carregada uma única vez.
+    """
+
+    def __init__(self):
+        self._armored: Dict[str, Optional[ChavePublica]] = {}
+        self._por_serial: Dict[Tuple[Callable, str], Optional[ChavePublica]] = {}
+
+    def resolver(self, fonte: FonteDeChave, serial: str) -> Optional[ChavePublica]:
+        if isinstance(fonte, ChavePublica):
+            return fonte
+        if isinstance(fonte, str):
+            if fonte not in self._armored:
+                self._armored[fonte] = _carregar_chave(fonte)
+            return self._armored[fonte]
+        if callable(fonte):
+            # Funções diferentes podem devolver chaves diferentes para o mesmo serial
+            if (fonte, serial) not in self._por_serial:
+                self._por_serial[fonte, serial] = _carregar_chave(fonte(serial))
+            return self._por_serial[fonte, serial]
+        return None
+
+
+def verificar_assinaturas(registros: Iterable[Tuple[bytes, Union[str, Dict[str, Any]], FonteDeChave]],
+                          executor: Executor = None,
+                          janela: int = 1024) -> Iterator[Dict[str, Any]]:
+    """
+    Verifica assinaturas em lote.
+
+    Os registros são lidos em janelas de `janela` itens. Em cada janela as
+     assinaturas são lidas uma vez, agrupadas pelo key_serial e exponenciadas
+     grupo a grupo com exponenciar_chunks, que distribui o trabalho pelo
+     executor quando houver um. Cada chave é carregada uma única vez em todo o
+     lote.
+
+    Args:
+        registros (Iterable[Tuple[bytes, Union[str, Dict[str, Any]], FonteDeChave]]): Tuplas
+            (conteúdo da mensagem, assinatura, chave). A chave pode ser uma ChavePublica, a
+            chave pública armored ou uma função que recebe o key_serial da assinatura e
+            devolve uma das duas.
+        executor (Executor, opcional): Executor usado para as exponenciações.
+        janela (int): Quantos registros processar de cada vez. Padrão é 1024.
+
+    Yields:
+        Dict[str, Any]: Para cada registro, na ordem de entrada, o mesmo dicionário
+        devolvido por Mensagem.verificar_assinatura. Um registro malformado, ou cuja chave
+        não pôde ser obtida, recebe {'valid': False, 'reason': ...} sem interromper o lote,
+        com reason 'malformed_signature', 'invalid_chunks', 'unknown_key' ou 'key_error',
+        além dos motivos de verificar_assinatura.
+    """
+    if janela < 1:
+        raise ValueError('janela must be at least 1')
+    resolvedor = _ResolvedorDeChaves()
+    registros = iter(registros)
+    while True:
+        bloco = list(islice(registros, janela))
+        if not bloco:
+            return
+        yield from _verificar_bloco(bloco, resolvedor, executor)
+
+
+def _verificar_bloco(bloco: List[Tuple[bytes, Union[str, Dict[str, Any]], FonteDeChave]],
+                     resolvedor: _ResolvedorDeChaves,
+                     executor: Optional[Executor]) -> List[Dict[str, Any]]:
+    resultados: List[Optional[Dict[str, Any]]] = [None] * len(bloco)
+    grupos: Dict[Tuple[str, int], Tuple[ChavePublica, List[Tuple[int, Dict[str, Any]]]]] = {}
+    for i, (_, assinatura, fonte) in enumerate(bloco):
+        try:
+            content, motivo = Mensagem._ler_assinatura(assinatura)
+        except _ERROS_DE_REGISTRO:
+            content, motivo = None, 'malformed_signature'
+        if content is None:
+            resultados[i] = {'valid': False, 'reason': motivo}
+            continue
+        serial = content.get('key_serial')
+        if not isinstance(serial, str):
+            resultados[i] = {'valid': False, 'reason': 'key_mismatch'}
+            continue
+        try:
+            chave = resolvedor.resolver(fonte, serial)
+        except Exception:  # A consulta da chave falhou só para este registro
+            resultados[i] = {'valid': False, 'reason': 'key_error'}
+            continue
+        if chave is None or chave.e is None or chave.n is None:
+            resultados[i] = {'valid': False, 'reason': 'unknown_key'}
+            continue
+        if serial != chave.serial:
+            resultados[i] = {'valid': False, 'reason': 'key_mismatch'}
+            continue
+        if content.get('chunks') is None:
+            resultados[i] = {'valid': False, 'reason': 'no_chunks'}
+            continue
+        # Validados aqui, os chunks não podem fazer a exponenciação do grupo falhar
+        if not Mensagem._chunks_validos(content['chunks'], chave.n):
+            resultados[i] = {'valid': False, 'reason': 'invalid_chunks'}
+            continue
+        # Chaves diferentes com o mesmo serial não podem compartilhar a exponenciação
+        grupos.setdefault((serial, id(chave)), (chave, []))[1].append((i, content))
+
+    for chave, itens in grupos.values():
+        todos = [chunk for _, content in itens for chunk in content['chunks']]
+        decifrados = exponenciar_chunks(todos, chave, executor)
+        inicio = 0
+        for i, content in itens:
+            fim = inicio + len(content['chunks'])
+            try:
+                mensagem = Mensagem(bloco[i][0])
+                resultados[i] = mensagem._conferir_assinatura(chave, content, decifrados[inicio:fim])
+            except _ERROS_DE_REGISTRO:
+                resultados[i] = {'valid': False, 'reason': 'malformed_signature'}
+            inicio = fim
+    return resultados
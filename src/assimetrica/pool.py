@@ -0,0 +1,222 @@
+import threading
+from collections import deque
+from concurrent.futures import BrokenExecutor, CancelledError, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.assimetrica import ParDeChaves
+
+
+def _gerar_par(bits: int) -> Optional[ParDeChaves]:
+    chaves = ParDeChaves()
+    return chaves if chaves.generate(bits=bits) else None
+
+
+class PoolDeChaves:
+    """
+    Reserva de pares de chaves RSA pré-gerados, reabastecida em segundo plano.
+
+    Para cada tamanho de chave é mantida uma fila de pares prontos. Quando a
+     fila chega à marca baixa, os trabalhadores passam a gerar novos pares até
+     atingir a marca alta. A retirada é O(1) e é nesse momento que o par recebe
+     o número de série, o proprietário e a data de emissão.
+
+    A geração, que é CPU-bound e segura o GIL, roda num pool de processos com
+     `workers` processos. Cada thread de reabastecimento apenas encomenda um
+     par a esse pool e espera o resultado, sem disputar o GIL com quem chama
+     `retirar`.
+
+    Atributos:
+        _alto (int): A marca alta, quantidade de pares mantida por tamanho.
+        _baixo (int): A marca baixa, abaixo da qual o reabastecimento é retomado.
+        _workers (int): O número de processos de geração (e de threads de reabastecimento).
+        _filas (Dict[int, deque]): Os pares prontos, por tamanho em bits.
+        _gerando (Dict[int, int]): Os pares em geração, por tamanho em bits.
+        _reabastecendo (Dict[int, bool]): Os tamanhos que estão sendo reabastecidos.
+        _condicao (threading.Condition): Protege o estado e sinaliza mudanças.
+        _threads (List[threading.Thread]): As threads de reabastecimento.
+        _executor (ProcessPoolExecutor): O pool de processos que gera os pares.
+        _ativo (bool): Indica se o reabastecimento está em execução.
+        _erro (Exception): A falha que interrompeu o reabastecimento, ou None.
+    """
+
+    def __init__(self,
+                 bits: Iterable[int] = (512,),
+                 alto: int = 8,
+                 baixo: int = 2,
+                 workers: int = 1):
+        if alto < 1 or baixo < 0 or baixo >= alto:
+            raise ValueError('watermarks must satisfy 0 <= baixo < alto')
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+        bits = list(bits)
+        if any(tamanho < 16 for tamanho in bits):
+            raise ValueError('bits must be at least 16')
+        self._alto = alto
+        self._baixo = baixo
+        self._workers = workers
+        self._filas: Dict[int, deque] = {tamanho: deque() for tamanho in bits}
+        self._gerando: Dict[int, int] = {tamanho: 0 for tamanho in self._filas}
+        self._reabastecendo: Dict[int, bool] = {tamanho: True for tamanho in self._filas}
+        self._condicao = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._executor = None
+        self._ativo = False
+        self._erro = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.parar()
+
+    @property
+    def ativo(self) -> bool:
+        return self._ativo
+
+    @property
+    def erro(self) -> Optional[Exception]:
+        return self._erro
+
+    def disponiveis(self, bits: int) -> int:
+        """
+        Retorna a quantidade de pares prontos para um tamanho de chave.
+
+        Args:
+            bits (int): O tamanho da chave em bits.
+
+        Returns:
+            int: A quantidade de pares prontos, ou 0 se o tamanho não for atendido.
+        """
+        with self._condicao:
+            fila = self._filas.get(bits)
+            return 0 if fila is None else len(fila)
+
+    def iniciar(self) -> bool:
+        """
+        Inicia as threads de reabastecimento.
+
+        Returns:
+            bool: True se as threads foram iniciadas, False se já estavam ativas.
+        """
+        with self._condicao:
+            if self._ativo:
+                return False
+            self._ativo = True
+            self._erro = None
+        if self._executor is not None:  # Sobra de um reabastecimento interrompido por falha
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        self._threads = [threading.Thread(target=self._trabalhar,
+                                          name=f'PoolDeChaves-{i}',
+                                          daemon=True)
+                         for i in range(self._workers)]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def parar(self, timeout: float = None) -> None:
+        """
+        Para o reabastecimento. Os pares prontos continuam disponíveis, e
+         quem estiver esperando em `retirar` por uma fila vazia recebe None.
+
+        Args:
+            timeout (float, opcional): Tempo máximo de espera por cada thread.
+        """
+        with self._condicao:
+            self._ativo = False
+            self._condicao.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def retirar(self,
+                bits: int,
+                issued_to: str = None,
+                issued_at: datetime = None,
+                bloquear: bool = True,
+                timeout: float = None) -> Optional[ParDeChaves]:
+        """
+        Retira um par de chaves pronto e o emite.
+
+        Args:
+            bits (int): O tamanho da chave em bits.
+            issued_to (str): O proprietário da chave.
+            issued_at (datetime): A data e hora de emissão da chave. Se None, a data e hora
+            atuais serão usadas.
+            bloquear (bool): Se True, espera até haver um par disponível enquanto o
+            reabastecimento estiver ativo. Padrão é True.
+            timeout (float, opcional): Tempo máximo de espera quando bloquear for True.
+
+        Returns:
+            Optional[ParDeChaves]: O par de chaves emitido, ou None se o tamanho não for
+            atendido pela reserva, se não houver par disponível a tempo ou se a fila
+            estiver vazia com o reabastecimento parado (por parar ou por uma falha, ver
+            erro).
+        """
+        with self._condicao:
+            fila = self._filas.get(bits)
+            if fila is None:
+                return None
+            if bloquear:
+                self._condicao.wait_for(lambda: len(fila) > 0 or not self._ativo, timeout)
+            if not fila:
+                return None
+            chaves = fila.popleft()
+            if len(fila) <= self._baixo and not self._reabastecendo[bits]:
+                self._reabastecendo[bits] = True
+                self._condicao.notify_all()
+        chaves.emitir(issued_to=issued_to, issued_at=issued_at)
+        return chaves
+
+    def _proximo_tamanho(self) -> Optional[int]:
+        # Chamado com a condição adquirida: escolhe o tamanho mais vazio
+        candidatos = [tamanho for tamanho, fila in self._filas.items()
+                      if self._reabastecendo[tamanho]
+                      and len(fila) + self._gerando[tamanho] < self._alto]
+        if not candidatos:
+            return None
+        return min(candidatos, key=lambda tamanho: len(self._filas[tamanho]))
+
+    def _trabalhar(self) -> None:
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(
+                        lambda: not self._ativo or self._proximo_tamanho() is not None)
+                if not self._ativo:
+                    return
+                tamanho = self._proximo_tamanho()
+                self._gerando[tamanho] += 1
+                executor = self._executor
+            chaves = None
+            try:
+                chaves = executor.submit(_gerar_par, tamanho).result()
+            except CancelledError:  # parar cancelou a encomenda
+                pass
+            except Exception as erro:
+                # Um processo do pool morreu (BrokenExecutor) ou a geração falhou: o
+                # reabastecimento para e quem espera em retirar é acordado. Se parar
+                # já encerrou o pool, a falha é só a encomenda recusada
+                with self._condicao:
+                    if self._ativo:
+                        self._erro = erro
+                        self._ativo = False
+                        self._condicao.notify_all()
+                    else:
+                        erro = None
+                if erro is not None and not isinstance(erro, BrokenExecutor):
+                    raise
+                return
+            finally:
+                with self._condicao:
+                    self._gerando[tamanho] -= 1
+                    fila = self._filas[tamanho]
+                    if chaves is not None:
+                        fila.append(chaves)
+                    if len(fila) >= self._alto:
+                        self._reabastecendo[tamanho] = False
+                    self._condicao.notify_all()
@@ -0,0 +1,260 @@
+import multiprocessing
+import secrets
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional
+
+
+def _crivo_de_eratostenes(limite: int) -> List[int]:
+    crivo = bytearray([1]) * limite
+    crivo[0:2] = b'\x00\x00'
+    for i in range(2, int(limite ** 0.5) + 1):
+        if crivo[i]:
+            crivo[i * i::i] = bytes(len(range(i * i, limite, i)))
+    return [i for i, primo in enumerate(crivo) if primo]
+
+
+# Primos ímpares pequenos usados para descartar candidatos por divisão
+# antes do teste de Miller-Rabin
+PRIMOS_PEQUENOS = _crivo_de_eratostenes(8192)[1:]
+
+# Pares (primo, inverso de 2 módulo primo), usados para localizar na janela
+# os candidatos divisíveis por cada primo pequeno
+_INVERSOS_DE_2 = [(primo, pow(2, -1, primo)) for primo in PRIMOS_PEQUENOS]
+
+
+def rodadas_miller_rabin(bits: int) -> int:
+    """
+    Escolhe o número de rodadas de Miller-Rabin para candidatos aleatórios
+     de um dado tamanho, mantendo a probabilidade de erro abaixo de 2^-80.
+
+    Args:
+        bits (int): O tamanho do candidato em bits.
+
+    Returns:
+        int: O número de rodadas.
+    """
+    if bits >= 3747:
+        return 3
+    if bits >= 1345:
+        return 4
+    if bits >= 476:
+        return 5
+    if bits >= 400:
+        return 6
+    if bits >= 347:
+        return 7
+    if bits >= 308:
+        return 8
+    if bits >= 55:
+        return 27
+    return 34
+
+
+def miller_rabin(n: int, rodadas: int) -> bool:
+    """
+    Teste probabilístico de primalidade de Miller-Rabin com bases aleatórias.
+
+    Args:
+        n (int): O número ímpar, maior que 3, a ser testado.
+        rodadas (int): O número de bases aleatórias a testar.
+
+    Returns:
+        bool: False se n for composto, True se n for provavelmente primo.
+    """
+    r = 0
+    s = n - 1
+    while s & 1 == 0:
+        s >>= 1
+        r += 1
+    for _ in range(rodadas):
+        a = secrets.randbelow(n - 3) + 2
+        x = pow(a, s, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def eh_primo(n: int) -> bool:
+    """
+    Verifica se um número é primo, por divisão pelos primos pequenos seguida
+     do teste de Miller-Rabin.
+
+    Args:
+        n (int): O número a ser verificado.
+
+    Returns:
+        bool: True se n for (provavelmente) primo, False caso contrário.
+    """
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    for primo in PRIMOS_PEQUENOS:
+        if n % primo == 0:
+            return n == primo
+        if primo * primo > n:
+            return True
+    return miller_rabin(n, rodadas_miller_rabin(n.bit_length()))
+
+
+def gerar_primo(bits: int = 16, parar=None) -> Optional[int]:
+    """
+    Gera um número primo com exatamente `bits` bits.
+
+    Os dois bits mais significativos são forçados para 1, de modo que o
+     produto de dois primos gerados tenha exatamente 2 * bits bits. A partir
+     de uma base ímpar aleatória, uma janela de candidatos (base, base + 2,
+     base + 4, ...) é peneirada contra a tabela de primos pequenos, e somente
+     os candidatos que sobrevivem passam pelo Miller-Rabin.
+
+    Args:
+        bits (int): O tamanho do primo em bits. Deve ser no mínimo 3.
+        parar (multiprocessing.Event, opcional): Quando sinalizado, a busca é
+            abandonada antes do próximo teste de Miller-Rabin.
+
+    Returns:
+        Optional[int]: O primo gerado ou None se a busca for interrompida.
+    """
+    if bits < 3:
+        raise ValueError('bits must be at least 3')
+    rodadas = rodadas_miller_rabin(bits)
+    janela = max(64, 4 * bits)
+    topo = 0b11 << (bits - 2)
+    tabela = _INVERSOS_DE_2
+    if bits <= PRIMOS_PEQUENOS[-1].bit_length():
+        # Só peneira com primos menores que qualquer base, para não descartar o próprio primo
+        tabela = [(primo, inverso) for primo, inverso in _INVERSOS_DE_2 if primo < topo]
+    while True:
+        base = secrets.randbits(bits) | topo | 1
+        crivo = bytearray([1]) * janela
+        for primo, inverso in tabela:
+            # Primeiro índice i tal que base + 2i seja divisível por primo
+            inicio = (-base * inverso) % primo
+            crivo[inicio::primo] = bytes(len(range(inicio, janela, primo)))
+        for i in range(janela):
+            if not crivo[i]:
+                continue
+            candidato = base + 2 * i
+            if candidato.bit_length() > bits:
+                break
+            if parar is not None and parar.is_set():
+                return None
+            if miller_rabin(candidato, rodadas):
+                return candidato
+
+
+# Evento de parada compartilhado com os processos trabalhadores
+_parar = None
+
+
+def _inicializar_trabalhador(parar) -> None:
+    global _parar
+    _parar = parar
+
+
+def _procurar_primo(bits: int) -> Optional[int]:
+    return gerar_primo(bits, parar=_parar)
+
+
+class BuscaDePrimos:
+    """
+    Busca de primos que reaproveita um único pool de processos entre chamadas.
+
+    Cada trabalhador executa uma busca independente. Assim que a quantidade
+     pedida de primos distintos é encontrada, o evento de parada é sinalizado
+     para interromper as buscas em andamento e as tarefas ainda não iniciadas
+     são canceladas. Com workers None ou 1 a busca é sequencial, no processo
+     atual, e nenhum pool é criado.
+
+    Atributos:
+        _workers (int): O número de processos.
+        _parar (multiprocessing.Event): O evento de parada compartilhado.
+        _executor (ProcessPoolExecutor): O pool de processos, se houver.
+    """
+
+    def __init__(self, workers: int = None):
+        self._workers = workers if workers is not None and workers > 1 else 1
+        self._parar = None
+        self._executor = None
+        if self._workers > 1:
+            self._parar = multiprocessing.Event()
+            self._executor = ProcessPoolExecutor(max_workers=self._workers,
+                                                 initializer=_inicializar_trabalhador,
+                                                 initargs=(self._parar,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
+
+    def fechar(self) -> None:
+        if self._executor is not None:
+            self._parar.set()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def gerar(self, bits: int = 16, quantidade: int = 1) -> List[int]:
+        """
+        Gera primos distintos de `bits` bits.
+
+        Args:
+            bits (int): O tamanho de cada primo em bits.
+            quantidade (int): Quantos primos distintos gerar. Padrão é 1.
+
+        Returns:
+            List[int]: Os primos gerados, na ordem em que foram encontrados.
+        """
+        encontrados = []
+        if self._executor is None:
+            while len(encontrados) < quantidade:
+                primo = gerar_primo(bits)
+                if primo not in encontrados:
+                    encontrados.append(primo)
+            return encontrados
+        self._parar.clear()
+        pendentes = {self._executor.submit(_procurar_primo, bits) for _ in range(self._workers)}
+        while len(encontrados) < quantidade:
+            feitos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                primo = futuro.result()
+                if primo is not None and primo not in encontrados:
+                    encontrados.append(primo)
+            while len(pendentes) < self._workers and len(encontrados) < quantidade:
+                pendentes.add(self._executor.submit(_procurar_primo, bits))
+        self._parar.set()
+        for futuro in pendentes:
+            futuro.cancel()
+        # Espera as buscas interrompidas terminarem antes de liberar o pool
+        # para a próxima chamada, que limpa o evento de parada
+        wait(pendentes)
+        return encontrados[:quantidade]
+
+
+def gerar_primos_em_paralelo(bits: int = 16,
+                             quantidade: int = 2,
+                             workers: int = None) -> List[int]:
+    """
+    Gera primos distintos de `bits` bits, buscando em paralelo num pool de
+     processos criado só para esta chamada (sequencialmente se houver uma
+     única CPU).
+
+    Args:
+        bits (int): O tamanho de cada primo em bits.
+        quantidade (int): Quantos primos distintos gerar. Padrão é 2.
+        workers (int, opcional): O número de processos. Se None, usa o número
+            de CPUs da máquina.
+
+    Returns:
+        List[int]: Os primos gerados, na ordem em que foram encontrados.
+    """
+    if workers is None or workers < 1:
+        workers = multiprocessing.cpu_count()
+    with BuscaDePrimos(workers) as busca:
+        return busca.gerar(bits, quantidade)
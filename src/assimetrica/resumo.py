@@ -0,0 +1,142 @@
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Union
+
+# Algoritmos de resumo aceitos nas assinaturas. Os códigos são usados no
+# formato binário e não podem mudar.
+ALGORITMOS: Dict[str, Callable] = {
+    'sha256' : hashlib.sha256,
+    'sha512' : hashlib.sha512,
+    'blake2b': hashlib.blake2b,
+}
+CODIGOS: Dict[str, int] = {'sha256': 0, 'sha512': 1, 'blake2b': 2}
+PADRAO = 'sha256'
+
+# Início do prefixo que identifica o resumo no bloco assinado (ver identificar)
+PREFIXO = b'SDG'
+
+# Menor folha aceita no modo árvore; o formato binário só representa
+# potências de 2 entre 2^10 e 2^24 bytes
+FOLHA_MINIMA = 1024
+FOLHA_MAXIMA = 1 << 24
+
+
+def validar(algoritmo: str, folha: Optional[int] = None) -> None:
+    """
+    Verifica se um algoritmo e um tamanho de folha são aceitos.
+
+    Args:
+        algoritmo (str): O nome do algoritmo.
+        folha (int, opcional): O tamanho das folhas no modo árvore, ou None.
+
+    Raises:
+        ValueError: Se o algoritmo for desconhecido ou a folha não for uma potência de 2
+        entre FOLHA_MINIMA e FOLHA_MAXIMA.
+    """
+    if algoritmo not in ALGORITMOS:
+        raise ValueError(f'unknown digest algorithm: {algoritmo}')
+    if folha is not None and (folha < FOLHA_MINIMA or folha > FOLHA_MAXIMA or folha & (folha - 1)):
+        raise ValueError('folha must be a power of 2 between 1 KiB and 16 MiB')
+
+
+def identificar(resumo: bytes, algoritmo: str = PADRAO, folha: Optional[int] = None) -> bytes:
+    """
+    Prefixa um resumo com o algoritmo e o tamanho das folhas, como o
+     DigestInfo do PKCS#1, para que sejam assinados junto com ele.
+
+    Sem o prefixo, a raiz de uma árvore seria também o resumo direto de
+     outro conteúdo (os bytes de entrada da raiz), e uma assinatura poderia
+     ter o algoritmo ou a folha declarados trocados. O SHA-256 direto fica
+     sem prefixo, como nas assinaturas anteriores; o prefixo sempre aumenta
+     o tamanho, então as duas formas não se confundem.
+
+    Args:
+        resumo (bytes): O resumo.
+        algoritmo (str): O algoritmo do resumo. Padrão é sha256.
+        folha (int, opcional): O tamanho das folhas no modo árvore, ou None.
+
+    Returns:
+        bytes: O resumo, precedido de PREFIXO, do código do algoritmo e de log2(folha) (0
+        sem árvore), exceto no SHA-256 direto.
+    """
+    validar(algoritmo, folha)
+    if algoritmo == PADRAO and folha is None:
+        return resumo
+    expoente = 0 if folha is None else folha.bit_length() - 1
+    return PREFIXO + bytes([CODIGOS[algoritmo], expoente]) + resumo
+
+
+def _resumir_folha(algoritmo: str, folha: Union[bytes, memoryview]) -> bytes:
+    resumo = ALGORITMOS[algoritmo](b'\x00')
+    resumo.update(folha)
+    return resumo.digest()
+
+
+def resumir_folhas(folhas: Iterable[Union[bytes, memoryview]],
+                   algoritmo: str = PADRAO,
+                   folha: int = FOLHA_MINIMA,
+                   executor: Executor = None) -> bytes:
+    """
+    Calcula o resumo em árvore de um conteúdo já dividido em folhas.
+
+    Cada folha é resumida como H(0x00 || folha), numa thread do executor (o
+     hashlib libera o GIL em entradas grandes), e a raiz é
+     H(0x01 || tamanho da folha || resumos das folhas || tamanho total), com
+     os tamanhos em 8 bytes big-endian. Só algumas folhas ficam em andamento
+     de cada vez, de modo que as folhas podem vir de leituras de arquivo.
+
+    Args:
+        folhas (Iterable[Union[bytes, memoryview]]): As folhas, em ordem; todas com `folha`
+        bytes exceto a última.
+        algoritmo (str): O algoritmo de resumo. Padrão é sha256.
+        folha (int): O tamanho das folhas em bytes.
+        executor (Executor, opcional): O executor das folhas. Se None, um pool de threads
+        com uma thread por CPU é criado para esta chamada.
+
+    Returns:
+        bytes: O resumo da raiz.
+    """
+    validar(algoritmo, folha)
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as proprio:
+            return resumir_folhas(folhas, algoritmo, folha, proprio)
+    raiz = ALGORITMOS[algoritmo](b'\x01' + folha.to_bytes(8, byteorder='big'))
+    limite = 2 * (os.cpu_count() or 1)
+    pendentes = deque()
+    total = 0
+    for dados in folhas:
+        total += len(dados)
+        pendentes.append(executor.submit(_resumir_folha, algoritmo, dados))
+        if len(pendentes) >= limite:
+            raiz.update(pendentes.popleft().result())
+    while pendentes:
+        raiz.update(pendentes.popleft().result())
+    raiz.update(total.to_bytes(8, byteorder='big'))
+    return raiz.digest()
+
+
+def resumir(dados: Union[bytes, bytearray, memoryview],
+            algoritmo: str = PADRAO,
+            folha: int = None,
+            executor: Executor = None) -> bytes:
+    """
+    Calcula o resumo de um conteúdo na memória.
+
+    Args:
+        dados (Union[bytes, bytearray, memoryview]): O conteúdo.
+        algoritmo (str): O algoritmo de resumo. Padrão é sha256.
+        folha (int, opcional): Se informado, usa o modo árvore com folhas desse tamanho
+        (ver resumir_folhas).
+        executor (Executor, opcional): O executor das folhas no modo árvore.
+
+    Returns:
+        bytes: O resumo.
+    """
+    validar(algoritmo, folha)
+    if folha is None:
+        return ALGORITMOS[algoritmo](dados).digest()
+    with memoryview(dados) as visao:
+        return resumir_folhas((visao[i:i + folha] for i in range(0, len(visao), folha)),
+                              algoritmo, folha, executor)
@@ -1,8 +1,29 @@
 import base64
 import binascii
-import textwrap
 from datetime import datetime
-from typing import Optional, Tuple, Union
+from typing import Iterable, Optional, Tuple, Union
+
+
+def _tabela_crc8(polinomio: int) -> bytes:
+    tabela = bytearray(256)
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ polinomio if crc & 0x80 else crc << 1) & 0xFF
+        tabela[byte] = crc
+    return bytes(tabela)
+
+
+# CRC-8 de cada byte isolado para o polinômio x^8 + x^2 + x + 1 (0x07)
+_TABELA_CRC8 = _tabela_crc8(0x07)
+
+
+def _crc8(data: Union[bytes, bytearray, memoryview]) -> int:
+    crc = 0
+    tabela = _TABELA_CRC8
+    for byte in data:
+        crc = tabela[crc ^ byte]
+    return crc
 
 
 class Ferramental:
@@ -14,15 +35,18 @@ class Ferramental:
         return end_banner, start_banner
 
     @staticmethod
-    def armored(base_bytes: bytes = None,
+    def armored(base_bytes: Union[bytes, bytearray, memoryview] = None,
                 service: str = '',
                 width: int = 72) -> Optional[str]:
         """
         Codifica um conjunto de bytes em base64 e a formata com banners de
          início e fim.
 
+        O base64 é quebrado em linhas de exatamente `width` caracteres (a
+         última pode ser menor) por fatiamento direto.
+
         Args:
-            base_bytes (str): O conjunto de bytes a ser formatado.
+            base_bytes (Union[bytes, bytearray, memoryview]): O conjunto de bytes a ser formatado.
             service (str): Nome do serviço que comporá o banner. Padrão é vazio.
             width (int): A largura máxima de cada linha da string codificada.
                          Padrão é 72.
@@ -32,25 +56,45 @@ class Ferramental:
         """
         if base_bytes is None:
             return None
-        if not isinstance(base_bytes, bytes):
+        if not isinstance(base_bytes, (bytes, bytearray, memoryview)):
             raise ValueError('base_bytes must be a byte type')
+        if width < 1:
+            raise ValueError('width must be at least 1')
         try:
-            base_bytes = base64.b64encode(base_bytes).decode('utf-8')
+            codificado = base64.b64encode(base_bytes)
         except (ValueError, TypeError):
             raise ValueError('base64 encoding error')
         end_banner, start_banner = Ferramental.create_banners(service)
-        wrapped = textwrap.fill(base_bytes, width)
-        return f"{start_banner}\n{wrapped}\n{end_banner}"
+        wrapped = b'\n'.join([codificado[i:i + width] for i in range(0, len(codificado), width)])
+        return f"{start_banner}\n{wrapped.decode('ascii')}\n{end_banner}"
 
     @staticmethod
-    def unarmor(base_str: str,
+    def _localizar_banner(texto: Union[str, bytes], banner: Union[str, bytes], inicio: int = 0) -> int:
+        # Posição do banner ocupando uma linha inteira, ou -1
+        quebras = '\r\n' if isinstance(texto, str) else b'\r\n'
+        posicao = texto.find(banner, inicio)
+        while posicao >= 0:
+            fim = posicao + len(banner)
+            if (posicao == 0 or texto[posicao - 1:posicao] in quebras) and \
+                    (fim == len(texto) or texto[fim:fim + 1] in quebras):
+                return posicao
+            posicao = texto.find(banner, posicao + 1)
+        return -1
+
+    @staticmethod
+    def unarmor(base_str: Union[str, bytes, bytearray, memoryview],
                 service: str = '') -> Optional[bytes]:
         """
         Remove banners de início e fim de uma string em base64 e retorna o
          conjunto de bytes.
 
+        Os banners são localizados por busca direta, sem dividir a entrada
+         em linhas, e as quebras de linha do base64 são descartadas na
+         decodificação.
+
         Args:
-            base_str (str): A string base codificada em base64 com banners.
+            base_str (Union[str, bytes, bytearray, memoryview]): A string base codificada em
+            base64 com banners.
             service (str): Nome do serviço que compõe o banner. Padrão é vazio.
 
         Returns:
@@ -59,18 +103,22 @@ class Ferramental:
         """
         if base_str is None:
             return None
-        if not isinstance(base_str, str):
+        if isinstance(base_str, (bytearray, memoryview)):
+            base_str = bytes(base_str)
+        if not isinstance(base_str, (str, bytes)):
             raise ValueError('base_str must be a str type')
-        lines = base_str.splitlines()
         end_banner, start_banner = Ferramental.create_banners(service)
-        try:
-            start_idx = lines.index(start_banner)
-            end_idx = lines.index(end_banner)
-        except ValueError('Missing start and/or end banner'):
+        if isinstance(base_str, bytes):
+            end_banner, start_banner = end_banner.encode('utf-8'), start_banner.encode('utf-8')
+        start_idx = Ferramental._localizar_banner(base_str, start_banner)
+        if start_idx < 0:
+            return None
+        start_idx += len(start_banner)
+        end_idx = Ferramental._localizar_banner(base_str, end_banner, start_idx)
+        if end_idx < 0:
             return None
-        base_str = ''.join(lines[start_idx + 1:end_idx]).strip()
         try:
-            return base64.b64decode(base_str)
+            return base64.b64decode(base_str[start_idx:end_idx])
         except (binascii.Error, ValueError):
             raise ValueError('base64 decoding error')
 
@@ -103,15 +151,35 @@ class Ferramental:
         """
         if isinstance(data, str):
             data = data.encode('utf-8')
-        if not isinstance(data, bytes):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
             raise ValueError('data must be a byte or str type')
-        crc = 0
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ 0x07
-                else:
-                    crc <<= 1
-                crc &= 0xFF
-        return bytes([crc])
+        return bytes([_crc8(data)])
+
+    @staticmethod
+    def crc8_lote(dados: Union[bytes, bytearray, memoryview, Iterable[bytes]] = None,
+                  passo: int = None) -> bytes:
+        """
+        Calcula o CRC-8 de vários blocos numa única chamada.
+
+        Args:
+            dados (Union[bytes, bytearray, memoryview, Iterable[bytes]]): Uma lista de blocos
+            ou, se passo for informado, um único buffer.
+            passo (int, opcional): Divide o buffer em fatias de `passo` bytes (a última pode
+            ser menor), sem copiá-lo.
+
+        Returns:
+            bytes: O CRC-8 de cada bloco, na ordem, um byte por bloco.
+        """
+        if passo is not None:
+            if passo < 1:
+                raise ValueError('passo must be at least 1')
+            if not isinstance(dados, (bytes, bytearray, memoryview)):
+                raise ValueError('dados must be a byte type when passo is given')
+            buffer = memoryview(dados)
+            dados = (buffer[i:i + passo] for i in range(0, len(buffer), passo))
+        resultado = bytearray()
+        for bloco in dados:
+            if not isinstance(bloco, (bytes, bytearray, memoryview)):
+                raise ValueError('data must be a byte type')
+            resultado.append(_crc8(bloco))
+        return bytes(resultado)
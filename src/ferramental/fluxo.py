@@ -0,0 +1,197 @@
+import binascii
+import math
+from typing import BinaryIO, Iterator, Optional, Union
+
+from src.ferramental import Ferramental
+
+# Quantos bytes de conteúdo codificar de cada vez, antes de arredondar para
+# um múltiplo que produza linhas completas
+_BLOCO = 64 * 1024
+
+# Limite de leitura por linha, para que uma linha sem quebras não seja lida
+# inteira para a memória
+_LIMITE_LINHA = 64 * 1024
+
+
+class EscritorArmored:
+    """
+    Codifica em base64, de forma incremental, os bytes escritos e os grava
+     num arquivo binário entre os banners de início e fim.
+
+    O resultado é idêntico ao de Ferramental.armored para o mesmo conteúdo,
+     mas só um bloco de poucos KB é mantido na memória. Os banners de fim só
+     são escritos em fechar (ou na saída do bloco with).
+
+    Atributos:
+        _arquivo (BinaryIO): O arquivo de destino.
+        _width (int): A largura das linhas de base64.
+        _bloco (int): Quantos bytes codificar de cada vez; sempre produz linhas completas.
+        _pendente (bytearray): Os bytes ainda não codificados.
+        _primeira_linha (bool): Indica se nenhuma linha de base64 foi escrita ainda.
+        _end_banner (bytes): O banner de fim.
+        _fechado (bool): Indica se o banner de fim já foi escrito.
+    """
+
+    def __init__(self, arquivo: BinaryIO, service: str = '', width: int = 72):
+        if width < 1:
+            raise ValueError('width must be at least 1')
+        end_banner, start_banner = Ferramental.create_banners(service)
+        self._arquivo = arquivo
+        self._width = width
+        # Cada 3 bytes viram 4 caracteres; o bloco precisa render um número inteiro de linhas
+        caracteres = width * 4 // math.gcd(width, 4)
+        unidade = caracteres * 3 // 4
+        self._bloco = max(1, _BLOCO // unidade) * unidade
+        self._pendente = bytearray()
+        self._primeira_linha = True
+        self._end_banner = end_banner.encode('utf-8')
+        self._fechado = False
+        self._arquivo.write(start_banner.encode('utf-8') + b'\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.fechar()
+
+    def escrever(self, dados: Union[bytes, bytearray, memoryview]) -> int:
+        """
+        Acrescenta bytes ao conteúdo.
+
+        Args:
+            dados (Union[bytes, bytearray, memoryview]): Os bytes a acrescentar.
+
+        Returns:
+            int: A quantidade de bytes aceitos.
+        """
+        if self._fechado:
+            raise ValueError('writer is closed')
+        if not isinstance(dados, (bytes, bytearray, memoryview)):
+            raise ValueError('dados must be a byte type')
+        self._pendente += dados
+        if len(self._pendente) >= self._bloco:
+            completos = len(self._pendente) - len(self._pendente) % self._bloco
+            self._gravar(memoryview(self._pendente)[:completos])
+            del self._pendente[:completos]
+        return len(dados)
+
+    def fechar(self) -> None:
+        """
+        Codifica o que restar e escreve o banner de fim. Não fecha o arquivo.
+        """
+        if self._fechado:
+            return
+        self._gravar(self._pendente)
+        self._pendente = bytearray()
+        self._arquivo.write(b'\n' + self._end_banner)
+        self._fechado = True
+
+    def _gravar(self, dados: Union[bytearray, memoryview]) -> None:
+        if not dados:
+            return
+        codificado = binascii.b2a_base64(dados, newline=False)
+        linhas = b'\n'.join([codificado[i:i + self._width]
+                             for i in range(0, len(codificado), self._width)])
+        self._arquivo.write(linhas if self._primeira_linha else b'\n' + linhas)
+        self._primeira_linha = False
+
+
+class LeitorArmored:
+    """
+    Lê de um arquivo binário um conteúdo armored e o decodifica de forma
+     incremental.
+
+    Linhas anteriores ao banner de início são ignoradas. O base64 é
+     decodificado em grupos completos de 4 caracteres, de modo que só uma
+     linha e alguns caracteres pendentes ficam na memória.
+
+    Atributos:
+        _arquivo (BinaryIO): O arquivo de origem.
+        _start_banner (bytes): O banner de início.
+        _end_banner (bytes): O banner de fim.
+        _iniciado (bool): Indica se o banner de início já foi encontrado.
+        _terminado (bool): Indica se o banner de fim já foi encontrado.
+        _inicio_de_linha (bool): Indica se a próxima leitura começa uma nova linha.
+        _pendente (bytearray): Os caracteres de base64 ainda não decodificados.
+        _decodificado (bytearray): Os bytes decodificados ainda não entregues.
+    """
+
+    def __init__(self, arquivo: BinaryIO, service: str = ''):
+        end_banner, start_banner = Ferramental.create_banners(service)
+        self._arquivo = arquivo
+        self._start_banner = start_banner.encode('utf-8')
+        self._end_banner = end_banner.encode('utf-8')
+        self._iniciado = False
+        self._terminado = False
+        self._inicio_de_linha = True
+        self._pendente = bytearray()
+        self._decodificado = bytearray()
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            bloco = self.ler(_BLOCO)
+            if not bloco:
+                return
+            yield bloco
+
+    def ler(self, tamanho: int = -1) -> bytes:
+        """
+        Lê bytes decodificados.
+
+        Args:
+            tamanho (int): Quantos bytes ler, no máximo. Se negativo, lê até o banner de fim.
+
+        Returns:
+            bytes: Os bytes lidos; vazio quando o banner de fim for atingido.
+
+        Raises:
+            ValueError: Se algum banner não for encontrado ou o base64 for inválido.
+        """
+        while (tamanho < 0 or len(self._decodificado) < tamanho) and not self._terminado:
+            self._avancar()
+        if tamanho < 0 or tamanho >= len(self._decodificado):
+            resultado = bytes(self._decodificado)
+            self._decodificado.clear()
+        else:
+            resultado = bytes(self._decodificado[:tamanho])
+            del self._decodificado[:tamanho]
+        return resultado
+
+    def _ler_linha(self) -> Optional[bytes]:
+        # Devolve a próxima linha completa sem a quebra, ou um pedaço de uma
+        # linha longa demais; None no fim do arquivo
+        linha = self._arquivo.readline(_LIMITE_LINHA)
+        if not linha:
+            return None
+        inteira = self._inicio_de_linha
+        # Sem quebra e abaixo do limite, a linha termina no fim do arquivo
+        self._inicio_de_linha = linha.endswith(b'\n') or len(linha) < _LIMITE_LINHA
+        linha = linha.rstrip(b'\r\n')
+        if inteira and self._inicio_de_linha:
+            return linha
+        # Pedaço de linha: nunca confundido com um banner
+        return b' ' + linha
+
+    def _avancar(self) -> None:
+        linha = self._ler_linha()
+        if linha is None:
+            raise ValueError('missing end banner' if self._iniciado else 'missing start banner')
+        if not self._iniciado:
+            self._iniciado = linha == self._start_banner
+            return
+        if linha == self._end_banner:
+            self._terminado = True
+            self._decodificar(final=True)
+            return
+        self._pendente += linha
+        self._decodificar()
+
+    def _decodificar(self, final: bool = False) -> None:
+        # Remove espaços e caracteres de controle, como Ferramental.unarmor
+        dados = bytes(self._pendente).translate(None, b' \t\r\n\x0b\x0c')
+        completos = len(dados) if final else len(dados) - len(dados) % 4
+        try:
+            self._decodificado += binascii.a2b_base64(dados[:completos])
+        except binascii.Error:
+            raise ValueError('base64 decoding error')
+        self._pendente = bytearray(dados[completos:])
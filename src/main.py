@@ -2,7 +2,9 @@ import json
 import os
 
 from simetrica import cifrar, decifrar, gerar_chave
+from simetrica.cache import CacheDeChavesDerivadas
 from src.assimetrica import Mensagem, ParDeChaves, TipoChave
+from src.assimetrica.cache import CacheDeChaves
 
 if __name__ == '__main__':
     # Armazenamento das chaves do usuário no banco #############################
@@ -17,8 +19,11 @@ if __name__ == '__main__':
     publica = chaves_do_usuario.public(armored=True)
     senha = input("Digite a senha de assinatura: ")
 
+    # O cache evita repetir a derivação (cerca de um segundo) a cada assinatura
+    cache_de_senhas = CacheDeChavesDerivadas(ttl_ocioso=60)
     chavesimetrica = gerar_chave(password=senha.encode('utf-8'),
-                                 salt=salt)
+                                 salt=salt,
+                                 cache=cache_de_senhas)
 
     # Isso é que vai pro banco #################################################
     # O que estamos fazendo com a chave privada é Key Wrapping
@@ -38,7 +43,10 @@ if __name__ == '__main__':
     print(registro_serializado)
 
     # Carrega a chave privada cifrada do banco e decifra ela com a senha
-    # de assinatura
+    # de assinatura, derivada de novo (pelo cache) como a cada assinatura
+    chavesimetrica = gerar_chave(password=senha.encode('utf-8'),
+                                 salt=salt,
+                                 cache=cache_de_senhas)
     chave_privada_para_assinar = decifrar(chavesimetrica,
                                           privada_cifrada).decode('utf-8')
 
@@ -52,13 +60,14 @@ if __name__ == '__main__':
 
     # Verificar assinatura do registro #########################################
     # Obter do banco a chave publica do usuario, para verificar a assinatura
+    # O cache evita carregar de novo a mesma chave a cada verificação
     chave_publica_para_verificar = publica_aberta
-    nova = ParDeChaves()
-    nova.load_key(chave_publica_para_verificar, TipoChave.PUBLICA)
+    cache_de_chaves = CacheDeChaves()
+    chave_publica = cache_de_chaves.carregar(chave_publica_para_verificar)
 
     # Verificar o registro sem mudanças
-    resultado = registro_serializado.verificar_assinatura(chave=nova.public(),
-                                              assinatura=assinatura)
+    resultado = registro_serializado.verificar_assinatura(chave=chave_publica,
+                                                          assinatura=assinatura)
     print(resultado)
 
     # Verificar o registro com mudanças
@@ -67,6 +76,6 @@ if __name__ == '__main__':
                 'email': 'bob@gmail.com'
                 }
     registro_serializado = Mensagem(json.dumps(registro))
-    resultado = registro_serializado.verificar_assinatura(chave=nova.public(),
+    resultado = registro_serializado.verificar_assinatura(chave=cache_de_chaves.carregar(chave_publica_para_verificar),
                                                           assinatura=assinatura)
     print(resultado)
@@ -2,14 +2,16 @@ import base64
 from typing import List, Optional, Tuple, Union
 
 from cryptography.fernet import Fernet, InvalidToken
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 from src.ferramental import Ferramental
+from src.simetrica.cache import CacheDeChavesDerivadas
+from src.simetrica.kdf import Kdf, Pbkdf2
 
 
 def gerar_chave(password: bytes = None,
-                salt: bytes = None) -> Optional[bytes]:
+                salt: bytes = None,
+                cache: CacheDeChavesDerivadas = None,
+                kdf: Union[Kdf, str] = None) -> Optional[bytes]:
     """
     Gera uma chave de criptografia para Fernet a partir de uma senha.
 
@@ -20,10 +22,15 @@ def gerar_chave(password: bytes = None,
     Args:
         password (bytes, opcional): A senha para derivar a chave.
         salt (bytes, opcional): O sal para derivar a chave.
+        cache (CacheDeChavesDerivadas, opcional): Cache em que a chave derivada é
+        procurada antes de derivar e guardada depois.
+        kdf (Union[Kdf, str], opcional): A função de derivação e seus parâmetros, ou a
+        forma produzida por Kdf.codificar guardada junto do sal (ver simetrica.kdf). Se
+        None, usa PBKDF2-HMAC-SHA256 com 1.200.000 iterações.
 
     Returns:
         Optional[bytes]: A chave gerada ou None se `password` for fornecido
-                         sem `salt`.
+                         sem `salt` ou se `kdf` for inválida.
     """
     if password is None:
         return Fernet.generate_key()
@@ -31,13 +38,18 @@ def gerar_chave(password: bytes = None,
     if salt is None:
         return None
 
-    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(),
-                     length=32,
-                     salt=salt,
-                     iterations=1_200_000,
-                     )
-    key = base64.urlsafe_b64encode(kdf.derive(password))
-    return key
+    if isinstance(kdf, str):
+        kdf = Kdf.carregar(kdf)
+        if kdf is None:
+            return None
+    if kdf is None:
+        kdf = Pbkdf2()
+
+    if cache is not None:
+        return cache.obter(password, salt, lambda: gerar_chave(password, salt, kdf=kdf),
+                           parametros=kdf.codificar().encode('utf-8'))
+
+    return base64.urlsafe_b64encode(kdf.derivar(password, salt))
 
 
 def cifrar(chave: bytes,
@@ -99,6 +111,8 @@ def decifrar(chave: bytes,
 
     if isinstance(criptotexto, str):
         criptotexto = Ferramental.unarmor(criptotexto)
+        if criptotexto is None:
+            return None
     elif not isinstance(criptotexto, bytes):
         return None
 
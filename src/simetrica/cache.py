@@ -0,0 +1,170 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+class CacheDeChavesDerivadas:
+    """
+    Cache LRU, em memória, de chaves derivadas de senhas por gerar_chave.
+
+    Evita repetir a derivação (PBKDF2 com 1.200.000 iterações, cerca de um
+     segundo) para a mesma senha e sal. As entradas são indexadas por um
+     HMAC-SHA256 de (senha, sal, parâmetros da Kdf) com um segredo aleatório
+     do processo, de
+     modo que nem a senha nem um resumo dela ficam guardados. Uma entrada
+     expira depois de `ttl_ocioso` segundos sem uso; quando a capacidade é
+     atingida, a usada há mais tempo é descartada. Entradas descartadas têm
+     a chave sobrescrita com zeros.
+
+    As chaves são devolvidas como bytes, que são imutáveis: só a cópia
+     guardada no cache pode ser zerada.
+
+    Atributos:
+        _capacidade (int): O número máximo de chaves mantidas.
+        _ttl_ocioso (float): Segundos sem uso até a entrada expirar, ou None.
+        _segredo (bytes): O segredo do HMAC que indexa as entradas.
+        _entradas (OrderedDict): índice -> (chave derivada, instante do último uso).
+        _lock (threading.Lock): Protege o estado.
+        _acertos (int): Quantidade de consultas atendidas pelo cache.
+        _falhas (int): Quantidade de derivações feitas.
+        _despejos (int): Quantidade de entradas descartadas por capacidade ou TTL.
+    """
+
+    def __init__(self, capacidade: int = 128, ttl_ocioso: float = 300):
+        if capacidade < 1:
+            raise ValueError('capacidade must be at least 1')
+        self._capacidade = capacidade
+        self._ttl_ocioso = ttl_ocioso
+        self._segredo = secrets.token_bytes(32)
+        self._entradas: OrderedDict[bytes, Tuple[bytearray, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._acertos = 0
+        self._falhas = 0
+        self._despejos = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+    @property
+    def acertos(self) -> int:
+        return self._acertos
+
+    @property
+    def falhas(self) -> int:
+        return self._falhas
+
+    @property
+    def despejos(self) -> int:
+        return self._despejos
+
+    def _indice(self, password: bytes, salt: bytes, parametros: bytes) -> bytes:
+        # Os tamanhos separam os campos: (b'ab', b'c') != (b'a', b'bc')
+        mac = hmac.new(self._segredo, digestmod=hashlib.sha256)
+        for campo in (password, parametros, salt):
+            mac.update(len(campo).to_bytes(8, byteorder='big'))
+            mac.update(campo)
+        return mac.digest()
+
+    def obter(self,
+              password: bytes,
+              salt: bytes,
+              derivar: Callable[[], Optional[bytes]],
+              parametros: bytes = b'') -> Optional[bytes]:
+        """
+        Retorna a chave derivada de (senha, sal), derivando-a só se não
+         estiver no cache.
+
+        Args:
+            password (bytes): A senha.
+            salt (bytes): O sal.
+            derivar (Callable[[], Optional[bytes]]): Função que faz a derivação.
+            parametros (bytes): Os parâmetros da derivação (ver Kdf.codificar), que também
+            distinguem as entradas.
+
+        Returns:
+            Optional[bytes]: A chave derivada, ou None se a derivação falhar.
+        """
+        indice = self._indice(password, salt, parametros)
+        agora = time.monotonic()
+        with self._lock:
+            self._expurgar(agora)
+            entrada = self._entradas.get(indice)
+            if entrada is not None:
+                self._entradas[indice] = (entrada[0], agora)
+                self._entradas.move_to_end(indice)
+                self._acertos += 1
+                return bytes(entrada[0])
+            self._falhas += 1
+        # A derivação é lenta e roda fora do lock
+        chave = derivar()
+        if chave is None:
+            return None
+        with self._lock:
+            self._remover(indice)
+            self._entradas[indice] = (bytearray(chave), time.monotonic())
+            while len(self._entradas) > self._capacidade:
+                self._remover(next(iter(self._entradas)))
+                self._despejos += 1
+        return chave
+
+    def invalidar(self, password: bytes, salt: bytes, parametros: bytes = b'') -> bool:
+        """
+        Remove e zera a chave derivada de (senha, sal, parâmetros).
+
+        Args:
+            password (bytes): A senha.
+            salt (bytes): O sal.
+            parametros (bytes): Os parâmetros da derivação, como em obter.
+
+        Returns:
+            bool: True se a chave estava no cache, False caso contrário.
+        """
+        with self._lock:
+            return self._remover(self._indice(password, salt, parametros))
+
+    def expurgar(self) -> int:
+        """
+        Remove e zera as entradas expiradas.
+
+        Returns:
+            int: A quantidade de entradas removidas.
+        """
+        with self._lock:
+            return self._expurgar(time.monotonic())
+
+    def limpar(self) -> None:
+        """
+        Remove e zera todas as entradas.
+        """
+        with self._lock:
+            while self._entradas:
+                self._remover(next(iter(self._entradas)))
+
+    def _expurgar(self, agora: float) -> int:
+        # Chamado com o lock adquirido. As entradas estão em ordem de uso, então
+        # as expiradas estão no início
+        if self._ttl_ocioso is None:
+            return 0
+        removidas = 0
+        while self._entradas:
+            indice, (_, usada) = next(iter(self._entradas.items()))
+            if agora - usada <= self._ttl_ocioso:
+                break
+            self._remover(indice)
+            removidas += 1
+        self._despejos += removidas
+        return removidas
+
+    def _remover(self, indice: bytes) -> bool:
+        # Chamado com o lock adquirido
+        entrada = self._entradas.pop(indice, None)
+        if entrada is None:
+            return False
+        chave = entrada[0]
+        chave[:] = bytes(len(chave))
+        return True
@@ -0,0 +1,155 @@
+import os
+import time
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar, Union
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from src.ferramental import Ferramental
+from src.simetrica.lote import _em_ordem
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Itens por tarefa no caminho com executor: tarefas de um item só custariam
+# mais em sincronização do que a cifração de valores pequenos
+TAMANHO_LOTE = 256
+
+
+class Cifrador:
+    """
+    Cifra e decifra com uma única chave, validada e preparada uma só vez.
+
+    simetrica.cifrar e simetrica.decifrar validam a chave e criam um Fernet
+     a cada chamada; para muitos valores pequenos (colunas de um banco, por
+     exemplo) esse preparo domina o custo. O Cifrador faz o preparo na
+     criação e oferece operações em lote, que aceitam listas ou iteradores e
+     devolvem os resultados na ordem de entrada, um a um.
+
+    Atributos:
+        _fernet (Fernet): O Fernet da chave.
+    """
+
+    def __init__(self, chave: bytes):
+        if not isinstance(chave, bytes) or len(chave) != 44:
+            raise ValueError('chave must be a 44-byte Fernet key')
+        self._fernet = Fernet(chave)
+
+    def cifrar(self, mensagem: bytes, armored: bool = False) -> Optional[Union[bytes, str]]:
+        """
+        Cifra uma mensagem, como simetrica.cifrar.
+
+        Args:
+            mensagem (bytes): A mensagem a ser cifrada.
+            armored (bool): Indica se a mensagem cifrada deve ser retornada em formato
+            armored. Padrão é False.
+
+        Returns:
+            Optional[Union[bytes, str]]: A mensagem cifrada ou None se a mensagem for inválida.
+        """
+        if not isinstance(mensagem, bytes):
+            return None
+        cifrado = self._fernet.encrypt(mensagem)
+        return Ferramental.armored(cifrado) if armored else cifrado
+
+    def decifrar(self, criptotexto: Union[bytes, str], ttl: int = None) -> Dict[str, Any]:
+        """
+        Decifra um criptotexto, informando o motivo de uma falha.
+
+        Args:
+            criptotexto (Union[bytes, str]): O texto cifrado, ou sua forma armored.
+            ttl (int, opcional): Tempo de vida em segundos para o criptotexto.
+
+        Returns:
+            Dict[str, Any]: {'valid': True, 'content': bytes} ou {'valid': False, 'reason': ...},
+            com reason sendo 'invalid_type', 'unarmor_error', 'invalid_token' (chave errada
+            ou conteúdo adulterado) ou 'expired' (autêntico, mas mais antigo que o ttl).
+        """
+        if isinstance(criptotexto, str):
+            try:
+                criptotexto = Ferramental.unarmor(criptotexto)
+            except ValueError:
+                criptotexto = None
+            if criptotexto is None:
+                return {'valid': False, 'reason': 'unarmor_error'}
+        elif not isinstance(criptotexto, bytes):
+            return {'valid': False, 'reason': 'invalid_type'}
+        try:
+            return {'valid': True, 'content': self._fernet.decrypt(criptotexto, ttl=ttl)}
+        except InvalidToken:
+            pass
+        if ttl is not None:
+            # O Fernet não distingue um token expirado de um inválido
+            try:
+                if time.time() - self._fernet.extract_timestamp(criptotexto) > ttl:
+                    return {'valid': False, 'reason': 'expired'}
+            except InvalidToken:
+                pass
+        return {'valid': False, 'reason': 'invalid_token'}
+
+    def encrypt_many(self,
+                     mensagens: Iterable[bytes],
+                     armored: bool = False,
+                     executor: Executor = None,
+                     tamanho_lote: int = TAMANHO_LOTE) -> Iterator[Optional[Union[bytes, str]]]:
+        """
+        Cifra várias mensagens.
+
+        Args:
+            mensagens (Iterable[bytes]): As mensagens; uma lista ou um iterador.
+            armored (bool): Indica se as mensagens cifradas devem ser retornadas em formato
+            armored. Padrão é False.
+            executor (Executor, opcional): Um pool de threads para lotes grandes. Se None, as
+            mensagens são cifradas na thread atual.
+            tamanho_lote (int): Quantas mensagens cada tarefa do executor processa. Padrão é
+            TAMANHO_LOTE.
+
+        Yields:
+            Optional[Union[bytes, str]]: Cada mensagem cifrada, na ordem de entrada, ou None
+            para uma mensagem inválida.
+        """
+        if executor is None:
+            return (self.cifrar(mensagem, armored) for mensagem in mensagens)
+        return _em_lotes(lambda mensagem: self.cifrar(mensagem, armored), mensagens, executor, tamanho_lote)
+
+    def decrypt_many(self,
+                     criptotextos: Iterable[Union[bytes, str]],
+                     ttl: int = None,
+                     executor: Executor = None,
+                     tamanho_lote: int = TAMANHO_LOTE) -> Iterator[Dict[str, Any]]:
+        """
+        Decifra vários criptotextos, com o resultado de cada um, como em
+         decifrar; uma falha não interrompe o lote.
+
+        Args:
+            criptotextos (Iterable[Union[bytes, str]]): Os criptotextos; uma lista ou um
+            iterador.
+            ttl (int, opcional): Tempo de vida em segundos para os criptotextos.
+            executor (Executor, opcional): Um pool de threads para lotes grandes. Se None, os
+            criptotextos são decifrados na thread atual.
+            tamanho_lote (int): Quantos criptotextos cada tarefa do executor processa. Padrão
+            é TAMANHO_LOTE.
+
+        Yields:
+            Dict[str, Any]: O resultado de cada criptotexto, na ordem de entrada.
+        """
+        if executor is None:
+            return (self.decifrar(criptotexto, ttl) for criptotexto in criptotextos)
+        return _em_lotes(lambda criptotexto: self.decifrar(criptotexto, ttl), criptotextos, executor, tamanho_lote)
+
+
+def _em_lotes(funcao: Callable[[T], R],
+              itens: Iterable[T],
+              executor: Executor,
+              tamanho_lote: int) -> Iterator[R]:
+    if tamanho_lote < 1:
+        raise ValueError('tamanho_lote must be at least 1')
+    itens = iter(itens)
+    lotes = iter(lambda: list(islice(itens, tamanho_lote)), [])
+
+    def processar(lote: List[T]) -> List[R]:
+        return [funcao(item) for item in lote]
+
+    for resultados in _em_ordem(processar, lotes, executor, 2 * (os.cpu_count() or 1)):
+        yield from resultados
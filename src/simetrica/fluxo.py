@@ -0,0 +1,208 @@
+import base64
+import binascii
+import os
+import struct
+from typing import BinaryIO, Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# Formato segmentado para cifrar arquivos grandes em fluxo
+#
+#   cabeçalho (big-endian, 23 bytes):
+#     magic             2s  b'SS'
+#     formato           B   versão do formato (1)
+#     tamanho_segmento  I   bytes de texto claro por segmento
+#     sal               16s sal aleatório do arquivo
+#   segmentos: AES-256-GCM de cada segmento, com 16 bytes de tag; todos têm
+#     tamanho_segmento bytes de texto claro, menos o último, que pode ter de 0
+#     a tamanho_segmento bytes e sempre existe
+#
+# A chave AES do arquivo é derivada da chave Fernet e do sal por HKDF-SHA256.
+# O nonce de cada segmento é o índice (11 bytes) seguido de 0x01 no último
+# segmento e 0x00 nos demais, e o cabeçalho inteiro é o dado associado. Assim
+# um segmento não pode ser trocado de posição, o arquivo não pode ser
+# truncado num limite de segmento e o cabeçalho não pode ser alterado sem que
+# a decifração falhe.
+
+MAGIC = b'SS'
+FORMATO = 1
+TAMANHO_SEGMENTO = 64 * 1024
+TAMANHO_TAG = 16
+
+_CABECALHO = struct.Struct('>2sBI16s')
+_INFO_HKDF = b'simetrica fluxo v1'
+
+
+def _chave_do_arquivo(chave: bytes, sal: bytes) -> Optional[AESGCM]:
+    if not isinstance(chave, bytes) or len(chave) != 44:
+        return None
+    try:
+        bruta = base64.urlsafe_b64decode(chave)
+    except (binascii.Error, ValueError):
+        return None
+    derivada = HKDF(algorithm=hashes.SHA256(), length=32, salt=sal, info=_INFO_HKDF).derive(bruta)
+    return AESGCM(derivada)
+
+
+def _nonce(indice: int, ultimo: bool) -> bytes:
+    return indice.to_bytes(11, byteorder='big') + (b'\x01' if ultimo else b'\x00')
+
+
+def _ler_exato(origem: BinaryIO, tamanho: int) -> bytes:
+    # read pode devolver menos bytes que o pedido antes do fim (sockets, pipes)
+    partes = []
+    while tamanho > 0:
+        parte = origem.read(tamanho)
+        if not parte:
+            break
+        partes.append(parte)
+        tamanho -= len(parte)
+    return b''.join(partes)
+
+
+def cifrar_fluxo(chave: bytes,
+                 origem: BinaryIO,
+                 destino: BinaryIO,
+                 tamanho_segmento: int = TAMANHO_SEGMENTO) -> Optional[int]:
+    """
+    Cifra o conteúdo de um arquivo (ou mmap) em segmentos autenticados,
+     escrevendo-os num arquivo à medida que são produzidos.
+
+    Só dois segmentos ficam na memória de cada vez, seja qual for o tamanho
+     do conteúdo: o atual e o seguinte, lido antes para saber se o atual é
+     o último.
+
+    Args:
+        chave (bytes): A chave Fernet, como gerada por gerar_chave.
+        origem (BinaryIO): O arquivo binário ou mmap de origem, lido a partir da posição
+        atual até o fim.
+        destino (BinaryIO): O arquivo binário de destino.
+        tamanho_segmento (int): Bytes de texto claro por segmento. Padrão é 64 KiB.
+
+    Returns:
+        Optional[int]: A quantidade de segmentos escritos, ou None se a chave ou o tamanho do
+        segmento forem inválidos.
+    """
+    if tamanho_segmento < 1 or tamanho_segmento > 0xFFFFFFFF - TAMANHO_TAG:
+        return None
+    sal = os.urandom(16)
+    aead = _chave_do_arquivo(chave, sal)
+    if aead is None:
+        return None
+    cabecalho = _CABECALHO.pack(MAGIC, FORMATO, tamanho_segmento, sal)
+    destino.write(cabecalho)
+    indice = 0
+    atual = _ler_exato(origem, tamanho_segmento)
+    while True:
+        seguinte = _ler_exato(origem, tamanho_segmento) if len(atual) == tamanho_segmento else b''
+        ultimo = not seguinte
+        destino.write(aead.encrypt(_nonce(indice, ultimo), atual, cabecalho))
+        indice += 1
+        if ultimo:
+            return indice
+        atual = seguinte
+
+
+def _ler_cabecalho(chave: bytes, origem: BinaryIO) -> Optional[Tuple[bytes, int, AESGCM]]:
+    cabecalho = _ler_exato(origem, _CABECALHO.size)
+    if len(cabecalho) != _CABECALHO.size:
+        return None
+    magic, formato, tamanho_segmento, sal = _CABECALHO.unpack(cabecalho)
+    if magic != MAGIC or formato != FORMATO or tamanho_segmento < 1:
+        return None
+    aead = _chave_do_arquivo(chave, sal)
+    if aead is None:
+        return None
+    return cabecalho, tamanho_segmento, aead
+
+
+def decifrar_fluxo(chave: bytes,
+                   origem: BinaryIO,
+                   destino: BinaryIO) -> bool:
+    """
+    Decifra um conteúdo produzido por cifrar_fluxo, segmento a segmento.
+
+    Cada segmento é autenticado antes de ser escrito, mas a falha de um
+     segmento (ou a falta do último) só é percebida quando ele é lido: se o
+     resultado for False, o que já foi escrito no destino deve ser descartado.
+
+    Args:
+        chave (bytes): A chave Fernet.
+        origem (BinaryIO): O arquivo binário ou mmap cifrado, lido a partir da posição atual.
+        destino (BinaryIO): O arquivo binário de destino.
+
+    Returns:
+        bool: True se todo o conteúdo foi autenticado e decifrado, False caso contrário.
+    """
+    lido = _ler_cabecalho(chave, origem)
+    if lido is None:
+        return False
+    cabecalho, tamanho_segmento, aead = lido
+    tamanho_cifrado = tamanho_segmento + TAMANHO_TAG
+    indice = 0
+    atual = _ler_exato(origem, tamanho_cifrado)
+    while True:
+        seguinte = _ler_exato(origem, tamanho_cifrado) if len(atual) == tamanho_cifrado else b''
+        ultimo = not seguinte
+        try:
+            destino.write(aead.decrypt(_nonce(indice, ultimo), atual, cabecalho))
+        except InvalidTag:
+            return False
+        if ultimo:
+            return True
+        indice += 1
+        atual = seguinte
+
+
+def decifrar_segmentos(chave: bytes,
+                       origem: BinaryIO,
+                       destino: BinaryIO,
+                       primeiro: int = 0,
+                       quantidade: int = None) -> bool:
+    """
+    Decifra só um intervalo de segmentos, posicionando a leitura diretamente
+     no primeiro deles.
+
+    O texto claro do segmento i começa no byte i * tamanho_segmento do
+     conteúdo original. A origem precisa permitir seek (um arquivo em disco
+     ou um mmap), para localizar os segmentos e saber qual é o último.
+
+    Args:
+        chave (bytes): A chave Fernet.
+        origem (BinaryIO): O arquivo binário ou mmap cifrado, com o cabeçalho na posição atual.
+        destino (BinaryIO): O arquivo binário de destino.
+        primeiro (int): O índice do primeiro segmento. Padrão é 0.
+        quantidade (int, opcional): Quantos segmentos decifrar. Se None, vai até o último.
+
+    Returns:
+        bool: True se todos os segmentos pedidos existem e foram autenticados e decifrados,
+        False caso contrário.
+    """
+    if primeiro < 0 or (quantidade is not None and quantidade < 0):
+        return False
+    inicio = origem.tell()
+    lido = _ler_cabecalho(chave, origem)
+    if lido is None:
+        return False
+    cabecalho, tamanho_segmento, aead = lido
+    tamanho_cifrado = tamanho_segmento + TAMANHO_TAG
+    # mmap.seek devolve None até o Python 3.12: o tamanho vem de tell
+    origem.seek(0, os.SEEK_END)
+    tamanho_total = origem.tell() - inicio - _CABECALHO.size
+    total = -(-tamanho_total // tamanho_cifrado)
+    if total == 0 or tamanho_total - (total - 1) * tamanho_cifrado < TAMANHO_TAG:
+        return False
+    fim = total if quantidade is None else primeiro + quantidade
+    if fim > total:
+        return False
+    origem.seek(inicio + _CABECALHO.size + primeiro * tamanho_cifrado)
+    for indice in range(primeiro, fim):
+        segmento = _ler_exato(origem, tamanho_cifrado)
+        try:
+            destino.write(aead.decrypt(_nonce(indice, indice == total - 1), segmento, cabecalho))
+        except InvalidTag:
+            return False
+    return True
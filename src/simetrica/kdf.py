@@ -0,0 +1,174 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt as _Scrypt
+
+# Limites dos parâmetros, aplicados na criação e na leitura de parâmetros
+# guardados: abaixo dos mínimos a derivação fica barata demais para proteger
+# senhas; acima dos máximos uma derivação pode ocupar a máquina por minutos
+# ou, no scrypt, mais de 1 GiB de memória (128 * n * r bytes)
+MINIMO_ITERACOES = 100_000
+MAXIMO_ITERACOES = 10_000_000
+MINIMO_N = 1 << 14
+MAXIMO_N = 1 << 20
+MAXIMO_R_P = 32
+MAXIMO_MEMORIA_SCRYPT = 1 << 30
+
+
+@dataclass(frozen=True)
+class Kdf(ABC):
+    """
+    Função de derivação de chaves a partir de senhas, com os parâmetros
+     escolhidos.
+
+    Os parâmetros são guardados junto do sal (ver codificar e carregar), de
+     modo que chaves derivadas com parâmetros antigos continuem sendo
+     reproduzidas depois de uma nova calibração. Parâmetros fora dos limites
+     deste módulo são recusados, tanto na criação quanto na leitura.
+    """
+
+    @abstractmethod
+    def derivar(self, password: bytes, salt: bytes) -> bytes:
+        """
+        Deriva 32 bytes da senha e do sal.
+
+        Args:
+            password (bytes): A senha.
+            salt (bytes): O sal.
+
+        Returns:
+            bytes: A chave derivada, 32 bytes.
+        """
+
+    @abstractmethod
+    def codificar(self) -> str:
+        """
+        Retorna os parâmetros como texto, para guardar junto do sal.
+        """
+
+    @staticmethod
+    def carregar(texto: str) -> Optional['Kdf']:
+        """
+        Lê os parâmetros produzidos por codificar.
+
+        Args:
+            texto (str): Os parâmetros codificados.
+
+        Returns:
+            Optional[Kdf]: A Kdf, ou None se o texto for inválido ou os parâmetros estiverem
+            fora dos limites.
+        """
+        if not isinstance(texto, str) or ':' not in texto:
+            return None
+        nome, _, parametros = texto.partition(':')
+        try:
+            valores = {chave: int(valor) for chave, valor in
+                       (item.split('=', 1) for item in parametros.split(','))}
+            if nome == 'pbkdf2-sha256' and valores.keys() == {'i'}:
+                return Pbkdf2(iteracoes=valores['i'])
+            if nome == 'scrypt' and valores.keys() == {'n', 'r', 'p'}:
+                return Scrypt(n=valores['n'], r=valores['r'], p=valores['p'])
+        except ValueError:
+            return None
+        return None
+
+
+@dataclass(frozen=True)
+class Pbkdf2(Kdf):
+    """
+    PBKDF2-HMAC-SHA256. O padrão de 1.200.000 iterações é o usado por
+     gerar_chave sem Kdf.
+
+    Atributos:
+        iteracoes (int): O número de iterações, entre MINIMO_ITERACOES e MAXIMO_ITERACOES.
+    """
+    iteracoes: int = 1_200_000
+
+    def __post_init__(self):
+        if not MINIMO_ITERACOES <= self.iteracoes <= MAXIMO_ITERACOES:
+            raise ValueError(f'iteracoes must be between {MINIMO_ITERACOES} and {MAXIMO_ITERACOES}')
+
+    def derivar(self, password: bytes, salt: bytes) -> bytes:
+        return PBKDF2HMAC(algorithm=hashes.SHA256(),
+                          length=32,
+                          salt=salt,
+                          iterations=self.iteracoes).derive(password)
+
+    def codificar(self) -> str:
+        return f'pbkdf2-sha256:i={self.iteracoes}'
+
+
+@dataclass(frozen=True)
+class Scrypt(Kdf):
+    """
+    scrypt, que além de CPU consome n * r * 128 bytes de memória por
+     derivação.
+
+    Atributos:
+        n (int): O custo de CPU e memória, uma potência de 2 entre MINIMO_N e MAXIMO_N.
+        r (int): O tamanho do bloco.
+        p (int): O paralelismo. r * p não passa de MAXIMO_R_P, e 128 * n * r não passa de
+            MAXIMO_MEMORIA_SCRYPT.
+    """
+    n: int = 1 << 17
+    r: int = 8
+    p: int = 1
+
+    def __post_init__(self):
+        if not MINIMO_N <= self.n <= MAXIMO_N or self.n & (self.n - 1):
+            raise ValueError(f'n must be a power of 2 between {MINIMO_N} and {MAXIMO_N}')
+        if self.r < 1 or self.p < 1 or self.r * self.p > MAXIMO_R_P:
+            raise ValueError(f'r and p must be positive with r * p at most {MAXIMO_R_P}')
+        if 128 * self.n * self.r > MAXIMO_MEMORIA_SCRYPT:
+            raise ValueError('128 * n * r must not exceed MAXIMO_MEMORIA_SCRYPT')
+
+    def derivar(self, password: bytes, salt: bytes) -> bytes:
+        return _Scrypt(salt=salt, length=32, n=self.n, r=self.r, p=self.p).derive(password)
+
+    def codificar(self) -> str:
+        return f'scrypt:n={self.n},r={self.r},p={self.p}'
+
+
+def _cronometrar(kdf: Kdf) -> float:
+    inicio = time.perf_counter()
+    kdf.derivar(b'calibracao', b'\x00' * 16)
+    return time.perf_counter() - inicio
+
+
+def calibrar(algoritmo: str = 'pbkdf2', alvo: float = 0.5) -> Kdf:
+    """
+    Escolhe os parâmetros de uma Kdf para que uma derivação leve cerca de
+     `alvo` segundos nesta máquina.
+
+    O custo das duas funções cresce linearmente com o parâmetro ajustado
+     (iterações no PBKDF2, n no scrypt), então basta uma medição com um
+     valor de referência. O resultado nunca fica abaixo de MINIMO_ITERACOES
+     ou MINIMO_N, mesmo que ultrapasse o alvo, nem acima de MAXIMO_ITERACOES
+     ou MAXIMO_N.
+
+    Args:
+        algoritmo (str): pbkdf2 ou scrypt. Padrão é pbkdf2.
+        alvo (float): A latência desejada em segundos. Padrão é 0.5.
+
+    Returns:
+        Kdf: A Kdf calibrada.
+    """
+    if alvo <= 0:
+        raise ValueError('alvo must be positive')
+    if algoritmo == 'pbkdf2':
+        referencia = Pbkdf2(iteracoes=MINIMO_ITERACOES)
+        tempo = _cronometrar(referencia)
+        iteracoes = int(referencia.iteracoes * alvo / tempo) // 10_000 * 10_000
+        return Pbkdf2(iteracoes=min(MAXIMO_ITERACOES, max(MINIMO_ITERACOES, iteracoes)))
+    if algoritmo == 'scrypt':
+        referencia = Scrypt(n=MINIMO_N)
+        tempo = _cronometrar(referencia)
+        # n precisa ser uma potência de 2: usa a maior que cabe no alvo
+        dobras = math.floor(math.log2(alvo / tempo)) if alvo > tempo else 0
+        return Scrypt(n=min(MAXIMO_N, MINIMO_N << dobras))
+    raise ValueError(f'unknown kdf: {algoritmo}')
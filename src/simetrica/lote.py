@@ -0,0 +1,123 @@
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar, Union
+
+from src.simetrica import cifrar, decifrar, gerar_chave
+from src.simetrica.kdf import Kdf
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# (senha, sal) ou (senha, sal, kdf) de uma derivação; sem a kdf, vale o
+# padrão de gerar_chave
+Credencial = Union[Tuple[bytes, bytes], Tuple[bytes, bytes, Union[Kdf, str]]]
+
+
+def _em_ordem(funcao: Callable[[T], R],
+              itens: Iterable[T],
+              executor: Executor,
+              janela: int) -> Iterator[R]:
+    # Mantém no máximo `janela` itens em andamento e devolve os resultados na
+    # ordem de entrada, conforme ficam prontos
+    pendentes = deque()
+    for item in itens:
+        pendentes.append(executor.submit(funcao, item))
+        if len(pendentes) >= janela:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+def _executar(funcao: Callable[[T], R],
+              itens: Iterable[T],
+              executor: Optional[Executor],
+              workers: Optional[int],
+              janela: Optional[int]) -> Iterator[R]:
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+    if janela is None:
+        janela = 2 * workers
+    if janela < 1:
+        raise ValueError('janela must be at least 1')
+    if executor is not None:
+        yield from _em_ordem(funcao, itens, executor, janela)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as proprio:
+        yield from _em_ordem(funcao, itens, proprio, janela)
+
+
+def _derivar(credencial: Credencial) -> Optional[bytes]:
+    password, salt, *kdf = credencial
+    return gerar_chave(password, salt, kdf=kdf[0] if kdf else None)
+
+
+def gerar_chaves(credenciais: Iterable[Credencial],
+                 workers: int = None,
+                 executor: Executor = None,
+                 janela: int = None) -> Iterator[Optional[bytes]]:
+    """
+    Deriva chaves de várias credenciais (senha, sal) num pool de processos.
+
+    O PBKDF2 de gerar_chave ocupa uma CPU por cerca de um segundo; aqui as
+     derivações são distribuídas pelos processos e os resultados são
+     entregues na ordem de entrada, à medida que ficam prontos. Só `janela`
+     derivações ficam em andamento de cada vez, de modo que as credenciais
+     podem vir de um cursor do banco.
+
+    Args:
+        credenciais (Iterable[Credencial]): As tuplas (senha, sal) ou (senha, sal, kdf).
+        workers (int, opcional): O número de processos. Se None, usa o número de CPUs.
+        executor (Executor, opcional): Um executor já criado. Se None, um pool de processos
+        é criado para esta chamada.
+        janela (int, opcional): Quantas derivações manter em andamento. Padrão é o dobro
+        de workers.
+
+    Yields:
+        Optional[bytes]: A chave de cada par, como em gerar_chave.
+    """
+    return _executar(_derivar, credenciais, executor, workers, janela)
+
+
+def _reembrulhar(item: Tuple[Union[bytes, str], Credencial, Credencial]) -> Optional[Union[bytes, str]]:
+    embrulhada, antiga, nova = item
+    chave_antiga = _derivar(antiga)
+    if chave_antiga is None:
+        return None
+    aberta = decifrar(chave_antiga, embrulhada)
+    if aberta is None:
+        return None
+    chave_nova = _derivar(nova)
+    if chave_nova is None:
+        return None
+    return cifrar(chave_nova, aberta, armored=isinstance(embrulhada, str))
+
+
+def reembrulhar(itens: Iterable[Tuple[Union[bytes, str], Credencial, Credencial]],
+                workers: int = None,
+                executor: Executor = None,
+                janela: int = None) -> Iterator[Optional[Union[bytes, str]]]:
+    """
+    Troca a chave que protege chaves privadas cifradas (key wrapping), em
+     lote, num pool de processos.
+
+    Cada item é decifrado com decifrar sob a chave derivada da credencial
+     antiga e cifrado de novo com cifrar sob a derivada da nova. As duas
+     derivações e a troca acontecem no mesmo processo trabalhador, e o
+     conteúdo aberto nunca volta ao processo que chamou.
+
+    Args:
+        itens (Iterable[Tuple[Union[bytes, str], Credencial, Credencial]]): Tuplas (chave
+            cifrada, credencial antiga, credencial nova), com as credenciais como em
+            gerar_chaves; a troca também serve para migrar de Kdf. Uma chave cifrada armored
+            (str) é devolvida armored.
+        workers (int, opcional): O número de processos. Se None, usa o número de CPUs.
+        executor (Executor, opcional): Um executor já criado. Se None, um pool de processos
+        é criado para esta chamada.
+        janela (int, opcional): Quantos itens manter em andamento. Padrão é o dobro de workers.
+
+    Yields:
+        Optional[Union[bytes, str]]: Para cada item, na ordem de entrada, a chave cifrada sob
+        a nova credencial, ou None se a credencial antiga não a decifrar.
+    """
+    return _executar(_reembrulhar, itens, executor, workers, janela)
@@ -1,8 +1,21 @@
 
 
+import hashlib
+import io
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from time import sleep
+
 import pytest
+import sympy
 
-from src.assimetrica import ChavePrivada, ChavePublica, ParDeChaves, TipoChave
+from src.assimetrica import ChavePrivada, ChavePublica, ChavePublicaPreguicosa, Mensagem, ParDeChaves, \
+    TipoChave, exponenciar_chunks, primos, resumo
+from src.assimetrica.arquivo import assinar_arquivo, resumir_arquivo, verificar_assinatura_arquivo
+from src.assimetrica.cache import CacheDeChaves
+from src.assimetrica.lote import verificar_assinaturas
+from src.assimetrica.pool import PoolDeChaves
+from src.ferramental import Ferramental
+from src.ferramental.fluxo import EscritorArmored, LeitorArmored
 
 
 @pytest.fixture
@@ -56,3 +69,620 @@ def test_load_private_key(par_de_chaves):
     assert new_chaves.has_private
     assert new_chaves.issued_to == "test@example.com"
     assert par_de_chaves.serial == new_chaves.serial
+
+
+def test_private_key_crt(par_de_chaves):
+    private_key = par_de_chaves.private()
+    assert private_key.has_crt
+    assert private_key.p * private_key.q == private_key.n
+    for valor in (0, 1, 12345, private_key.n - 1):
+        assert private_key.exponenciar(valor) == pow(valor, private_key.d, private_key.n)
+
+
+def test_load_private_key_crt(par_de_chaves):
+    private_key_str = par_de_chaves.private(armored=True)
+    new_chaves = ParDeChaves()
+    assert new_chaves.load_key(private_key_str, TipoChave.PRIVADA)
+    assert new_chaves.private().has_crt
+    assert new_chaves.qinv == par_de_chaves.qinv
+
+
+def test_decifrar_e_assinar_sem_crt(par_de_chaves):
+    private_key = par_de_chaves.private()
+    sem_crt = ChavePrivada(issued_at=private_key.issued_at,
+                           issued_to=private_key.issued_to,
+                           serial=private_key.serial,
+                           size=private_key.size,
+                           n=private_key.n,
+                           d=private_key.d)
+    assert not sem_crt.has_crt
+    msg = Mensagem("Olá, mundo!")
+    cifrado = msg.cifrar(par_de_chaves.public(), size=16, armored=True)
+    decifrado = Mensagem()
+    assert decifrado.decifrar(sem_crt, cifrado)
+    assert decifrado.conteudo == msg.conteudo
+    assinatura = msg.assinar(sem_crt, armored=False)
+    assert assinatura['chunks'] == msg.assinar(private_key, armored=False)['chunks']
+
+
+def test_gerar_primo_tamanho_exato():
+    for bits in (16, 64, 256):
+        primo = ParDeChaves.gerar_primo(bits)
+        assert primo.bit_length() == bits
+        assert primos.eh_primo(primo)
+
+
+def test_eh_primo():
+    assert [n for n in range(30) if primos.eh_primo(n)] == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+    assert primos.eh_primo(2 ** 127 - 1)
+    assert not primos.eh_primo((2 ** 61 - 1) * (2 ** 31 - 1))
+    # Número de Carmichael
+    assert not primos.eh_primo(561)
+
+
+def test_generate_tamanho_do_modulo(par_de_chaves):
+    assert par_de_chaves.n.bit_length() == 2 * par_de_chaves.size
+
+
+def test_gerar_primos_em_paralelo():
+    encontrados = primos.gerar_primos_em_paralelo(bits=128, quantidade=3, workers=2)
+    assert len(encontrados) == 3
+    assert len(set(encontrados)) == 3
+    assert all(primo.bit_length() == 128 and primos.eh_primo(primo) for primo in encontrados)
+
+
+def test_busca_de_primos_reaproveita_pool():
+    with primos.BuscaDePrimos(workers=2) as busca:
+        executor = busca._executor
+        primeiros = busca.gerar(bits=64, quantidade=2)
+        segundo = busca.gerar(bits=64)
+        assert busca._executor is executor
+    assert busca._executor is None
+    assert len(primeiros) == 2 and len(segundo) == 1
+    assert all(primo.bit_length() == 64 for primo in primeiros + segundo)
+
+
+def test_generate_paralelo():
+    chaves = ParDeChaves()
+    assert chaves.generate(bits=256, issued_to="test@example.com", workers=2)
+    assert chaves.p != chaves.q
+    assert chaves.n == chaves.p * chaves.q
+    msg = Mensagem("Olá, mundo!")
+    assinatura = msg.assinar(chaves.private())
+    assert msg.verificar_assinatura(chaves.public(), assinatura)['valid']
+
+
+def test_pool_de_chaves():
+    with PoolDeChaves(bits=(64,), alto=3, baixo=1, workers=2) as pool:
+        chaves = pool.retirar(64, issued_to="pool@example.com", timeout=30)
+        assert chaves is not None
+        assert chaves.issued_to == "pool@example.com"
+        assert chaves.has_private and chaves.has_public
+        outras = pool.retirar(64, timeout=30)
+        assert outras.serial != chaves.serial
+        assert outras.n != chaves.n
+    assert pool.retirar(128, bloquear=False) is None
+    assert pool.disponiveis(64) <= 3
+
+
+def test_pool_de_chaves_sem_bloquear():
+    pool = PoolDeChaves(bits=(64,), alto=2, baixo=0)
+    assert pool.retirar(64, bloquear=False) is None
+    assert pool.retirar(64, timeout=0.01) is None
+
+
+@pytest.mark.parametrize("quantidade_primos", [3, 4])
+def test_generate_multiplos_primos(quantidade_primos):
+    chaves = ParDeChaves()
+    assert chaves.generate(bits=256, issued_to="test@example.com",
+                           quantidade_primos=quantidade_primos)
+    assert chaves.n.bit_length() == 512
+    assert len(chaves.outros_primos) == quantidade_primos - 2
+    private_key = chaves.private()
+    for valor in (2, 12345, private_key.n - 1):
+        assert private_key.exponenciar(valor) == pow(valor, private_key.d, private_key.n)
+
+    carregada = ParDeChaves()
+    assert carregada.load_key(chaves.private(armored=True), TipoChave.PRIVADA)
+    assert carregada.outros_primos == chaves.outros_primos
+
+    msg = Mensagem("O rato roeu a roupa do rei de Roma")
+    cifrado = msg.cifrar(chaves.public(), size=32, armored=True)
+    decifrado = Mensagem()
+    assert decifrado.decifrar(carregada.private(), cifrado)
+    assert decifrado.conteudo == msg.conteudo
+    assinatura = msg.assinar(carregada.private())
+    assert msg.verificar_assinatura(chaves.public(), assinatura)['valid']
+
+
+def test_generate_quantidade_primos_invalida():
+    assert not ParDeChaves().generate(bits=256, quantidade_primos=5)
+
+
+def test_generate_multiplos_primos_sorteia_todos_novamente(monkeypatch):
+    # Primos iniciais pequenos demais tornam 2 * bits inalcançável trocando só o último
+    pequenos = [sympy.nextprime(3 << 126)]
+    for _ in range(3):
+        pequenos.append(sympy.nextprime(pequenos[-1]))
+    sorteios = iter([pequenos])
+    original = ParDeChaves._gerar_fatores
+
+    def gerar_fatores(tamanhos, busca):
+        return list(next(sorteios, None) or original(tamanhos, busca))
+
+    monkeypatch.setattr(ParDeChaves, '_gerar_fatores', staticmethod(gerar_fatores))
+    chaves = ParDeChaves()
+    assert chaves.generate(bits=256, quantidade_primos=4)
+    assert chaves.n.bit_length() == 512
+
+
+def test_private_key_armored_sem_outros_primos(par_de_chaves):
+    private_key_str = par_de_chaves.private(armored=True)
+    assert b'outros_primos' not in Ferramental.unarmor(private_key_str, "private key")
+
+
+def test_load_private_key_crt_inconsistente(par_de_chaves):
+    private_key = par_de_chaves.private()
+    private_key.q += 2
+    new_chaves = ParDeChaves()
+    assert new_chaves.load_key(private_key)
+    assert not new_chaves.private().has_crt
+    msg = Mensagem("Olá, mundo!")
+    assinatura = msg.assinar(new_chaves.private())
+    assert msg.verificar_assinatura(par_de_chaves.public(), assinatura)['valid']
+
+
+def test_pool_de_chaves_parado_nao_bloqueia():
+    pool = PoolDeChaves(bits=(64,), alto=2, baixo=0)
+    assert pool.retirar(64) is None
+    with pool:
+        assert pool.retirar(64, timeout=30) is not None
+    while pool.disponiveis(64):
+        assert pool.retirar(64) is not None
+    assert pool.retirar(64) is None
+
+
+def test_pool_de_chaves_executor_quebrado():
+    pool = PoolDeChaves(bits=(4096,), alto=2, baixo=0)
+    with pool:
+        while not pool._executor._processes:
+            sleep(0.01)
+        for processo in list(pool._executor._processes.values()):
+            processo.kill()
+        assert pool.retirar(4096) is None
+        assert not pool.ativo
+        assert isinstance(pool.erro, BrokenExecutor)
+
+
+def test_assinatura_versao_2(par_de_chaves):
+    msg = Mensagem("O rato roeu a roupa do rei de Roma")
+    assinatura = msg.assinar(par_de_chaves.private(), armored=False)
+    assert assinatura['version'] == 2
+    assert len(assinatura['chunks']) == 1
+    assert msg.verificar_assinatura(par_de_chaves.public(), assinatura)['valid']
+    outra = Mensagem("O rato roeu a roupa do rei de Milão")
+    resultado = outra.verificar_assinatura(par_de_chaves.public(), assinatura)
+    assert not resultado['valid']
+    assert resultado['reason'] == 'hash_mismatch'
+
+
+def test_assinatura_versao_1_continua_valida(par_de_chaves):
+    msg = Mensagem("O rato roeu a roupa do rei de Roma")
+    assinatura = msg.assinar(par_de_chaves.private(), armored=False, versao=1)
+    assert len(assinatura['chunks']) > 1
+    del assinatura['version']  # Assinaturas anteriores não registravam a versão
+    assert msg.verificar_assinatura(par_de_chaves.public(), assinatura)['valid']
+
+
+def test_assinatura_versao_automatica_chave_pequena():
+    chaves = ParDeChaves()
+    chaves.generate(bits=64)
+    msg = Mensagem("Olá, mundo!")
+    assert msg.assinar(chaves.private(), versao=2) is None
+    assinatura = msg.assinar(chaves.private(), armored=False)
+    assert assinatura['version'] == 1
+    assert msg.verificar_assinatura(chaves.public(), assinatura)['valid']
+
+
+def test_cifrar_tamanho_automatico(par_de_chaves):
+    msg = Mensagem("O rato roeu a roupa do rei de Roma" * 10)
+    public_key = par_de_chaves.public()
+    cifrado = msg.cifrar(public_key, armored=True)
+    estimativa = Mensagem.estimar_chunks(public_key, msg.size)
+    assert estimativa['chunk_size'] == 127  # n com 1024 bits
+    assert estimativa['chunks'] == (msg.size + 124) // 125
+    decifrado = Mensagem()
+    assert decifrado.decifrar(par_de_chaves.private(), cifrado)
+    assert decifrado.conteudo == msg.conteudo
+    assert len(msg.cifrar(public_key)['chunks']) == estimativa['chunks']
+
+
+def test_cifrar_envelope(par_de_chaves):
+    msg = Mensagem(b'\x00registro grande' * 4096)
+    cifrado = msg.cifrar(par_de_chaves.public(), armored=True, envelope=True)
+    assert "-----BEGIN MESSAGE-----" in cifrado
+    decifrado = Mensagem()
+    assert decifrado.decifrar(par_de_chaves.private(), cifrado)
+    assert decifrado.conteudo == msg.conteudo
+
+
+def test_cifrar_envelope_uma_exponenciacao(par_de_chaves):
+    msg = Mensagem("O rato roeu a roupa do rei de Roma" * 1000)
+    cifrado = msg.cifrar(par_de_chaves.public(), envelope=True)
+    assert cifrado['envelope']
+    assert len(cifrado['chunks']) == 1
+    cifrado['payload'] = cifrado['payload'][:-4] + 'AAAA'
+    cifrado['padding'] = 'nw=='
+    assert not Mensagem().decifrar(par_de_chaves.private(), cifrado)
+
+
+def test_cifrar_e_decifrar_com_executor(par_de_chaves):
+    msg = Mensagem(bytes(range(256)) * 16)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        cifrado = msg.cifrar(par_de_chaves.public(), size=16, armored=True, executor=executor)
+        decifrado = Mensagem()
+        assert decifrado.decifrar(par_de_chaves.private(), cifrado, executor=executor)
+    assert decifrado.conteudo == msg.conteudo
+
+
+def test_exponenciar_chunks_preserva_ordem(par_de_chaves):
+    public_key = par_de_chaves.public()
+    chunks = list(range(2, 200))
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        paralelo = exponenciar_chunks(chunks, public_key, executor, limiar=1)
+    assert paralelo == exponenciar_chunks(chunks, public_key)
+
+
+def test_verificar_assinaturas_em_lote(par_de_chaves):
+    outras = ParDeChaves()
+    outras.generate(bits=256)
+    publicas = {par_de_chaves.serial: par_de_chaves.public(armored=True),
+                outras.serial: outras.public()}
+    consultas = []
+
+    def buscar(serial):
+        consultas.append(serial)
+        return publicas.get(serial)
+
+    registros = []
+    for i in range(10):
+        chaves = par_de_chaves if i % 2 else outras
+        conteudo = f"registro {i}".encode('utf-8')
+        registros.append((conteudo, Mensagem(conteudo).assinar(chaves.private()), buscar))
+    registros.append((b"adulterado", registros[0][1], buscar))
+    registros.append((b"qualquer", "-----BEGIN SIGNATURE-----\nbGl4bw==\n-----END SIGNATURE-----", buscar))
+    registros.append((b"registro 1", registros[1][1], outras.public()))
+
+    resultados = list(verificar_assinaturas(registros, janela=4))
+    assert [r['valid'] for r in resultados] == [True] * 10 + [False] * 3
+    assert resultados[10]['reason'] == 'hash_mismatch'
+    assert resultados[11]['reason'] == 'json_error'
+    assert resultados[12]['reason'] == 'key_mismatch'
+    esperado = Mensagem(b"registro 1").verificar_assinatura(par_de_chaves.public(), registros[1][1])
+    assert resultados[1] == esperado
+    assert sorted(consultas) == sorted(publicas)
+
+
+def test_verificar_assinaturas_registros_malformados(par_de_chaves):
+    assinatura = Mensagem(b"ok").assinar(par_de_chaves.private(), armored=False)
+    chunk_texto = dict(assinatura, chunks=["abc"])
+    nao_dict = Ferramental.armored(b"[1, 2]", service="signature")
+
+    def buscar(serial):
+        if serial == par_de_chaves.serial:
+            return par_de_chaves.public()
+        raise LookupError(serial)
+
+    registros = [(b"ok", assinatura, buscar),
+                 (b"ok", chunk_texto, buscar),
+                 (b"ok", nao_dict, buscar),
+                 (b"ok", b"SD\x01\x02 lixo", buscar),
+                 (b"ok", dict(assinatura, key_serial="outro"), buscar),
+                 (b"ok", assinatura, lambda serial: None),
+                 (b"ok", assinatura, buscar)]
+    resultados = list(verificar_assinaturas(registros))
+    assert [r['valid'] for r in resultados] == [True] + [False] * 5 + [True]
+    assert [r.get('reason') for r in resultados[1:6]] == ['invalid_chunks', 'json_error', 'binary_error',
+                                                          'key_error', 'unknown_key']
+    assert Mensagem(b"ok").verificar_assinatura(par_de_chaves.public(), chunk_texto)['reason'] == 'invalid_chunks'
+
+
+def test_cache_de_chaves(par_de_chaves):
+    armored = par_de_chaves.public(armored=True)
+    cache = CacheDeChaves(capacidade=2)
+    primeira = cache.carregar(armored)
+    assert primeira.n == par_de_chaves.n
+    assert cache.carregar(armored) is primeira
+    assert cache.obter(par_de_chaves.serial) is primeira
+    assert (cache.acertos, cache.falhas) == (2, 1)
+    assert cache.invalidar(par_de_chaves.serial)
+    assert cache.obter(par_de_chaves.serial) is None
+    assert cache.carregar("lixo") is None
+
+
+def test_cache_de_chaves_rejeita_serial_trocado(par_de_chaves):
+    outra = ParDeChaves()
+    outra.generate(bits=64)
+    formas = {par_de_chaves.serial: outra.public(armored=True), outra.serial: outra.public(binario=True)}
+    cache = CacheDeChaves(buscar=formas.get)
+    assert cache.obter(par_de_chaves.serial) is None
+    assert len(cache) == 0
+    assert cache.obter(outra.serial).n == outra.n
+
+
+def test_cache_de_chaves_lru_e_ttl(par_de_chaves):
+    chaves = []
+    for _ in range(3):
+        outra = ParDeChaves()
+        outra.generate(bits=64)
+        chaves.append(outra.public())
+    cache = CacheDeChaves(capacidade=2, buscar={c.serial: c for c in chaves}.get)
+    assert cache.obter(chaves[0].serial) is chaves[0]
+    assert cache.obter(chaves[1].serial) is chaves[1]
+    assert cache.obter(chaves[0].serial) is chaves[0]
+    assert cache.obter(chaves[2].serial) is chaves[2]
+    assert cache.despejos == 1
+    assert len(cache) == 2
+    assert cache.invalidar(chaves[0].serial)
+    assert not cache.invalidar(chaves[1].serial)
+
+    expira = CacheDeChaves(ttl=0)
+    expira.adicionar(chaves[0])
+    sleep(0.01)
+    assert expira.obter(chaves[0].serial) is None
+    assert expira.despejos == 1
+
+
+@pytest.mark.parametrize("envelope", [False, True])
+def test_cifrar_binario(par_de_chaves, envelope):
+    msg = Mensagem("O rato roeu a roupa do rei de Roma" * 20)
+    cifrado = msg.cifrar(par_de_chaves.public(), binario=True, envelope=envelope)
+    assert isinstance(cifrado, bytes)
+    armored = msg.cifrar(par_de_chaves.public(), armored=True, envelope=envelope)
+    assert len(cifrado) < len(armored)
+    decifrado = Mensagem()
+    assert decifrado.decifrar(par_de_chaves.private(), cifrado)
+    assert decifrado.conteudo == msg.conteudo
+    assert not Mensagem().decifrar(par_de_chaves.private(), cifrado[:-10])
+
+
+def test_assinar_binario(par_de_chaves):
+    msg = Mensagem("O rato roeu a roupa do rei de Roma")
+    for versao in (1, 2):
+        assinatura = msg.assinar(par_de_chaves.private(), versao=versao, binario=True)
+        assert isinstance(assinatura, bytes)
+        resultado = msg.verificar_assinatura(par_de_chaves.public(), assinatura)
+        assert resultado['valid']
+        assert resultado['issued_to'] == "test@example.com"
+    cifrado = msg.cifrar(par_de_chaves.public(), binario=True)
+    assert msg.verificar_assinatura(par_de_chaves.public(), cifrado)['reason'] == 'binary_error'
+
+
+def test_decifrar_dicionario_nao_serializado(par_de_chaves):
+    msg = Mensagem("Olá, mundo!")
+    decifrado = Mensagem()
+    assert decifrado.decifrar(par_de_chaves.private(), msg.cifrar(par_de_chaves.public()))
+    assert decifrado.conteudo == msg.conteudo
+
+
+def test_chaves_binarias(par_de_chaves):
+    publica = par_de_chaves.public(binario=True)
+    privada = par_de_chaves.private(binario=True)
+    assert isinstance(publica, bytes) and isinstance(privada, bytes)
+    assert len(publica) < len(par_de_chaves.public(armored=True))
+    chaves = ParDeChaves()
+    assert chaves.load_key(privada)
+    assert chaves.has_private and chaves.private().d == par_de_chaves.d
+    assert chaves.private().qinv == par_de_chaves.qinv
+    chaves = ParDeChaves()
+    assert not chaves.load_key(publica, TipoChave.PRIVADA)
+    assert chaves.load_key(par_de_chaves.public(armored=True, binario=True), TipoChave.PUBLICA)
+    assert chaves.public().n == par_de_chaves.n
+    assert chaves.serial == par_de_chaves.serial
+    assert chaves.issued_to == "test@example.com"
+
+
+def test_chaves_serializadas_memorizadas(par_de_chaves):
+    armored = par_de_chaves.public(armored=True)
+    assert par_de_chaves.public(armored=True) is armored
+    par_de_chaves.emitir(issued_to="outro@example.com")
+    assert par_de_chaves.public(armored=True) != armored
+
+
+def test_chave_publica_preguicosa(par_de_chaves):
+    chave = ChavePublicaPreguicosa.carregar(par_de_chaves.public(armored=True, binario=True))
+    assert chave.serial == par_de_chaves.serial
+    assert not chave.decodificada
+    mensagem = Mensagem(b"conteudo")
+    assinatura = mensagem.assinar(par_de_chaves.private())
+    assert mensagem.verificar_assinatura(chave, assinatura)['valid']
+    assert chave.decodificada and chave.n == par_de_chaves.n
+    assert ChavePublicaPreguicosa.carregar(par_de_chaves.private(binario=True)) is None
+
+
+def test_crc8_tabela():
+    def crc8_bit_a_bit(data):
+        crc = 0
+        for byte in data:
+            crc ^= byte
+            for _ in range(8):
+                crc = ((crc << 1) ^ 0x07 if crc & 0x80 else crc << 1) & 0xFF
+        return bytes([crc])
+
+    for data in (b'', b'\x00', b'123456789', bytes(range(256)) * 3):
+        assert Ferramental.crc8(data) == crc8_bit_a_bit(data)
+    assert Ferramental.crc8(b'123456789') == b'\xf4'
+    buffer = bytes(range(256)) * 3
+    esperado = b''.join(crc8_bit_a_bit(buffer[i:i + 100]) for i in range(0, len(buffer), 100))
+    assert Ferramental.crc8_lote(buffer, passo=100) == esperado
+    assert Ferramental.crc8_lote([buffer[i:i + 100] for i in range(0, len(buffer), 100)]) == esperado
+
+
+@pytest.mark.parametrize("tamanho", [0, 1, 53, 54, 55, 1000])
+def test_armored_identico_ao_textwrap(tamanho):
+    import base64
+    import textwrap
+    dados = bytes(range(256)) * 4
+    dados = dados[:tamanho]
+    esperado = "-----BEGIN MESSAGE-----\n" + textwrap.fill(base64.b64encode(dados).decode(), 72) + \
+               "\n-----END MESSAGE-----"
+    assert Ferramental.armored(dados, "message") == esperado
+    assert Ferramental.armored(memoryview(dados), "message") == esperado
+    assert Ferramental.unarmor(esperado, "message") == dados
+    assert Ferramental.unarmor(esperado.replace("\n", "\r\n").encode(), "message") == dados
+
+
+def test_unarmor_sem_banner():
+    assert Ferramental.unarmor("sem banners", "message") is None
+    assert Ferramental.unarmor("-----BEGIN MESSAGE-----\nAAAA\n", "message") is None
+    assert Ferramental.unarmor("-----BEGIN MESSAGE-----X\nAAAA\n-----END MESSAGE-----", "message") is None
+
+
+@pytest.mark.parametrize("width", [72, 64, 5])
+def test_armored_em_fluxo(width):
+    dados = bytes(range(256)) * 700
+    destino = io.BytesIO()
+    with EscritorArmored(destino, "message", width=width) as escritor:
+        for i in range(0, len(dados), 1000):
+            escritor.escrever(dados[i:i + 1000])
+    assert destino.getvalue().decode() == Ferramental.armored(dados, "message", width=width)
+
+    leitor = LeitorArmored(io.BytesIO(b"cabecalho\r\n" + destino.getvalue() + b"\nrodape"), "message")
+    assert leitor.ler(10) == dados[:10]
+    assert leitor.ler(0) == b''
+    assert leitor.ler(10) + b''.join(leitor) == dados[10:]
+    assert leitor.ler() == b''
+
+
+def test_armored_em_fluxo_vazio_e_sem_banner():
+    destino = io.BytesIO()
+    EscritorArmored(destino, "signature").fechar()
+    assert destino.getvalue().decode() == Ferramental.armored(b'', "signature")
+    assert LeitorArmored(io.BytesIO(destino.getvalue()), "signature").ler() == b''
+    with pytest.raises(ValueError):
+        LeitorArmored(io.BytesIO(destino.getvalue()), "message").ler()
+    with pytest.raises(ValueError):
+        LeitorArmored(io.BytesIO(b"-----BEGIN MESSAGE-----\nAAAA\n"), "message").ler()
+
+
+def test_mensagem_buffer():
+    mensagem = Mensagem("abc")
+    conteudo = mensagem.conteudo
+    assert mensagem.conteudo is conteudo
+    for _ in range(1000):
+        mensagem.append(b"d")
+    mensagem.append("é")
+    mensagem.append(0x0102)
+    assert mensagem.conteudo == b"abc" + b"d" * 1000 + "é".encode() + b"\x01\x02"
+    assert mensagem.size == len(mensagem.conteudo)
+    with pytest.raises(AttributeError):
+        mensagem.extra = 1
+    chunks = mensagem.dumps(size=16)
+    copia = Mensagem()
+    assert copia.loads(chunks)
+    assert copia.conteudo == mensagem.conteudo
+    copia.append(b"!")
+    assert copia.conteudo.endswith(b"!")
+
+
+def test_mensagem_resumo_incremental(par_de_chaves, monkeypatch):
+    mensagem = Mensagem(b"parte 1")
+    assert mensagem.resumo == hashlib.sha256(b"parte 1").digest()
+    mensagem.append(b", parte 2")
+    assert mensagem.resumo_hex == hashlib.sha256(b"parte 1, parte 2").hexdigest()
+    assert mensagem.get_hash == mensagem.resumo_hex
+    mensagem.conteudo = b"outra"
+    assert mensagem.resumo == hashlib.sha256(b"outra").digest()
+
+    assinaturas = [Mensagem(b"x" * 100000).assinar(par_de_chaves.private(), versao=versao) for versao in (1, 2)]
+    chamadas = []
+    sha256 = hashlib.sha256
+    monkeypatch.setattr(hashlib, "sha256", lambda *args: chamadas.append(1) or sha256(*args))
+    mensagem = Mensagem(b"x" * 100000)
+    for assinatura in assinaturas * 2:
+        assert mensagem.verificar_assinatura(par_de_chaves.public(), assinatura)['valid']
+    assert len(chamadas) == 1
+
+
+@pytest.mark.parametrize("usar_mmap", [False, True])
+def test_assinar_arquivo(par_de_chaves, tmp_path, usar_mmap):
+    conteudo = bytes(range(256)) * 5000
+    caminho = tmp_path / "artefato.bin"
+    caminho.write_bytes(conteudo)
+    assert resumir_arquivo(caminho, tamanho_bloco=1000, usar_mmap=usar_mmap) == hashlib.sha256(conteudo).digest()
+    vazio = tmp_path / "vazio.bin"
+    vazio.write_bytes(b"")
+    assert resumir_arquivo(vazio, usar_mmap=usar_mmap) == hashlib.sha256(b"").digest()
+
+    for versao in (1, 2):
+        assinatura = assinar_arquivo(caminho, par_de_chaves.private(), versao=versao, usar_mmap=usar_mmap)
+        assert Mensagem(conteudo).verificar_assinatura(par_de_chaves.public(), assinatura)['valid']
+    assinatura = Mensagem(conteudo).assinar(par_de_chaves.private(), binario=True)
+    with open(caminho, 'rb') as arquivo:
+        assert verificar_assinatura_arquivo(arquivo, par_de_chaves.public(), assinatura, usar_mmap)['valid']
+    resultado = verificar_assinatura_arquivo(vazio, par_de_chaves.public(), assinatura, usar_mmap)
+    assert not resultado['valid'] and resultado['reason'] == 'hash_mismatch'
+
+
+@pytest.mark.parametrize("algoritmo", ["sha256", "sha512", "blake2b"])
+@pytest.mark.parametrize("folha", [None, 1024])
+def test_assinatura_algoritmos_de_resumo(par_de_chaves, tmp_path, algoritmo, folha):
+    conteudo = bytes(range(256)) * 50
+    mensagem = Mensagem(conteudo)
+    assinatura = mensagem.assinar(par_de_chaves.private(), armored=False, algoritmo=algoritmo, folha=folha)
+    assert assinatura['digest'] == algoritmo
+    assert assinatura.get('tree_leaf') == folha
+    assert mensagem.verificar_assinatura(par_de_chaves.public(), assinatura)['valid']
+    binaria = mensagem.assinar(par_de_chaves.private(), binario=True, algoritmo=algoritmo, folha=folha)
+    assert mensagem.verificar_assinatura(par_de_chaves.public(), binaria)['valid']
+
+    caminho = tmp_path / "artefato.bin"
+    caminho.write_bytes(conteudo)
+    for usar_mmap in (False, True):
+        assert verificar_assinatura_arquivo(caminho, par_de_chaves.public(), binaria, usar_mmap)['valid']
+    assert Mensagem(conteudo + b"!").verificar_assinatura(par_de_chaves.public(), assinatura)['reason'] == \
+           'hash_mismatch'
+
+
+def test_resumo_em_arvore():
+    conteudo = bytes(range(256)) * 40
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        raiz = resumo.resumir(conteudo, "sha256", folha=1024, executor=executor)
+    assert raiz == resumo.resumir(conteudo, "sha256", folha=1024)
+    assert raiz != resumo.resumir(conteudo, "sha256", folha=2048)
+    assert raiz != resumo.resumir(conteudo, "sha256")
+    with pytest.raises(ValueError):
+        resumo.resumir(conteudo, "md5")
+    with pytest.raises(ValueError):
+        resumo.resumir(conteudo, "sha256", folha=1000)
+
+
+def test_assinatura_algoritmo_desconhecido(par_de_chaves):
+    mensagem = Mensagem(b"conteudo")
+    assert mensagem.assinar(par_de_chaves.private(), algoritmo="md5") is None
+    assinatura = mensagem.assinar(par_de_chaves.private(), armored=False)
+    assinatura['digest'] = 'md5'
+    assert mensagem.verificar_assinatura(par_de_chaves.public(), assinatura)['reason'] == 'unknown_digest'
+
+
+def test_assinatura_vincula_algoritmo_e_folha(par_de_chaves):
+    conteudo = bytes(range(256)) * 10
+    assinatura = Mensagem(conteudo).assinar(par_de_chaves.private(), armored=False, folha=1024)
+    folhas = [conteudo[i:i + 1024] for i in range(0, len(conteudo), 1024)]
+    # Os bytes de entrada da raiz da árvore, cujo SHA-256 direto é a própria raiz
+    forjada = b"\x01" + (1024).to_bytes(8, "big") + \
+              b"".join(hashlib.sha256(b"\x00" + folha).digest() for folha in folhas) + \
+              len(conteudo).to_bytes(8, "big")
+    assert hashlib.sha256(forjada).digest() == resumo.resumir(conteudo, folha=1024)
+    sem_folha = {chave: valor for chave, valor in assinatura.items() if chave != "tree_leaf"}
+    resultado = Mensagem(forjada).verificar_assinatura(par_de_chaves.public(), sem_folha)
+    assert not resultado['valid'] and resultado['reason'] == 'hash_mismatch'
+    outra_folha = dict(assinatura, tree_leaf=2048)
+    assert not Mensagem(conteudo).verificar_assinatura(par_de_chaves.public(), outra_folha)['valid']
+
+    for versao, algoritmo in ((2, "sha256"), (1, "sha512")):
+        assinatura = Mensagem(conteudo).assinar(par_de_chaves.private(), armored=False, versao=versao,
+                                                algoritmo=algoritmo)
+        assert Mensagem(conteudo).verificar_assinatura(par_de_chaves.public(), assinatura)['valid']
+        trocada = dict(assinatura, digest="blake2b" if algoritmo == "sha512" else "sha512")
+        assert not Mensagem(conteudo).verificar_assinatura(par_de_chaves.public(), trocada)['valid']
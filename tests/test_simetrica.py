@@ -1,3 +1,6 @@
+import io
+import mmap
+import os
 from time import sleep
 
 import pytest
@@ -5,6 +8,7 @@ from cryptography.fernet import Fernet
 
 from src.simetrica import cifrar, cifrar_cesar, cifrar_transposicao_colunar, decifrar, \
     decifrar_cesar, decifrar_transposicao_colunar, gerar_chave
+from src.simetrica.fluxo import TAMANHO_TAG, cifrar_fluxo, decifrar_fluxo, decifrar_segmentos
 
 
 @pytest.fixture
@@ -167,3 +171,177 @@ def test_decifrar_cesar_sem_chave():
 def test_decifrar_cesar_sem_mensagem():
     decifrado = decifrar_cesar(chave=3)
     assert decifrado is None
+
+
+def test_gerar_chave_com_cache():
+    from src.simetrica.cache import CacheDeChavesDerivadas
+    cache = CacheDeChavesDerivadas(capacidade=1)
+    chave = gerar_chave(b"senha", b"sal", cache=cache)
+    assert chave == gerar_chave(b"senha", b"sal")
+    assert gerar_chave(b"senha", b"sal", cache=cache) == chave
+    assert cache.acertos == 1 and cache.falhas == 1
+    guardada = next(iter(cache._entradas.values()))[0]
+    assert gerar_chave(b"outra", b"sal", cache=cache) != chave
+    assert cache.despejos == 1 and len(cache) == 1
+    assert guardada == bytes(len(guardada))
+    cache.limpar()
+    assert len(cache) == 0
+
+
+def test_cache_de_chaves_derivadas_ttl():
+    from src.simetrica.cache import CacheDeChavesDerivadas
+    cache = CacheDeChavesDerivadas(ttl_ocioso=0.05)
+    derivacoes = []
+    derivar = lambda: derivacoes.append(1) or b"k" * 44  # noqa: E731
+    cache.obter(b"a", b"s", derivar)
+    cache.obter(b"a", b"s", derivar)
+    assert len(derivacoes) == 1
+    sleep(0.1)
+    assert cache.expurgar() == 1
+    cache.obter(b"a", b"s", derivar)
+    assert len(derivacoes) == 2
+    assert cache.invalidar(b"a", b"s") and not cache.invalidar(b"a", b"s")
+
+
+def test_gerar_chaves_em_lote():
+    from src.simetrica.lote import gerar_chaves
+    credenciais = [(b"senha 1", b"sal 1"), (b"senha 2", b"sal 2"), (b"senha 3", None)]
+    chaves = list(gerar_chaves(iter(credenciais), workers=2, janela=1))
+    assert chaves[:2] == [gerar_chave(*credencial) for credencial in credenciais[:2]]
+    assert chaves[2] is None
+
+
+def test_reembrulhar_em_lote(mensagem_padrao):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.simetrica.lote import reembrulhar
+    antiga, nova = (b"senha", b"sal antigo"), (b"senha", b"sal novo")
+    chave_antiga = gerar_chave(*antiga)
+    embrulhadas = [cifrar(chave_antiga, mensagem_padrao.encode(), armored=True),
+                   cifrar(Fernet.generate_key(), mensagem_padrao.encode())]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resultado = list(reembrulhar([(embrulhada, antiga, nova) for embrulhada in embrulhadas], executor=executor))
+    chave_nova = gerar_chave(*nova)
+    assert isinstance(resultado[0], str)
+    assert decifrar(chave_nova, resultado[0]) == mensagem_padrao.encode()
+    assert resultado[1] is None
+
+
+def test_gerar_chave_com_kdf(mensagem_padrao):
+    from src.simetrica.kdf import Kdf, Pbkdf2, Scrypt
+    assert gerar_chave(b"senha", b"sal", kdf=Pbkdf2()) == gerar_chave(b"senha", b"sal")
+    scrypt = Scrypt(n=1 << 14)
+    assert Kdf.carregar(scrypt.codificar()) == scrypt
+    assert Kdf.carregar(Pbkdf2(iteracoes=200_000).codificar()) == Pbkdf2(iteracoes=200_000)
+    for invalido in ("scrypt:n=1000,r=8,p=1", "pbkdf2-sha256:i=0", "pbkdf2-sha256", "md5:i=1",
+                     "pbkdf2-sha256:i=1000", "pbkdf2-sha256:i=1000000000", "scrypt:n=1024,r=8,p=1",
+                     "scrypt:n=1048576,r=16,p=1", "scrypt:n=16384,r=8,p=64", "scrypt:n=16384,r=0,p=1"):
+        assert Kdf.carregar(invalido) is None
+        assert gerar_chave(b"senha", b"sal", kdf=invalido) is None
+    with pytest.raises(TypeError):
+        Kdf()
+    with pytest.raises(ValueError):
+        Pbkdf2(iteracoes=1000)
+    with pytest.raises(ValueError):
+        Scrypt(n=(1 << 14) + 1)
+    chave = gerar_chave(b"senha", b"sal", kdf=scrypt.codificar())
+    assert chave != gerar_chave(b"senha", b"sal", kdf=Scrypt(n=1 << 15))
+    assert decifrar(chave, cifrar(gerar_chave(b"senha", b"sal", kdf=scrypt), mensagem_padrao.encode())) == \
+           mensagem_padrao.encode()
+
+
+def test_calibrar_kdf():
+    from src.simetrica.kdf import MINIMO_ITERACOES, MINIMO_N, Pbkdf2, Scrypt, calibrar
+    pbkdf2 = calibrar('pbkdf2', alvo=0.001)
+    assert pbkdf2 == Pbkdf2(iteracoes=MINIMO_ITERACOES)
+    scrypt = calibrar('scrypt', alvo=0.001)
+    assert scrypt == Scrypt(n=MINIMO_N)
+    with pytest.raises(ValueError):
+        calibrar('bcrypt')
+
+
+@pytest.mark.parametrize("com_executor", [False, True])
+def test_cifrador_em_lote(nova_chave, chave_errada, com_executor):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.simetrica.cifrador import Cifrador
+    cifrador = Cifrador(nova_chave)
+    mensagens = [f"valor {i}".encode() for i in range(600)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor = executor if com_executor else None
+        cifrados = list(cifrador.encrypt_many(iter(mensagens), executor=executor, tamanho_lote=100))
+        assert [decifrar(nova_chave, cifrado) for cifrado in cifrados] == mensagens
+        entrada = cifrados[:2] + [cifrar(chave_errada, b"x"), "sem banners", 123]
+        resultados = list(cifrador.decrypt_many(entrada, executor=executor, tamanho_lote=2))
+    assert resultados[:2] == [{'valid': True, 'content': mensagem} for mensagem in mensagens[:2]]
+    assert [resultado['reason'] for resultado in resultados[2:]] == ['invalid_token', 'unarmor_error',
+                                                                    'invalid_type']
+
+
+def test_cifrador(nova_chave, mensagem_padrao):
+    from src.simetrica.cifrador import Cifrador
+    with pytest.raises(ValueError):
+        Cifrador(b"curta")
+    cifrador = Cifrador(nova_chave)
+    armored = cifrador.cifrar(mensagem_padrao.encode(), armored=True)
+    assert decifrar(nova_chave, armored) == mensagem_padrao.encode()
+    assert cifrador.cifrar(mensagem_padrao) is None
+    antigo = cifrador.cifrar(b"antigo")
+    sleep(2)
+    assert cifrador.decifrar(antigo, ttl=1) == {'valid': False, 'reason': 'expired'}
+    assert cifrador.decifrar(antigo, ttl=60)['valid']
+
+
+@pytest.mark.parametrize("tamanho", [0, 1000, 4096, 10000])
+def test_cifrar_fluxo(nova_chave, tamanho):
+    conteudo = os.urandom(tamanho)
+    cifrado = io.BytesIO()
+    assert cifrar_fluxo(nova_chave, io.BytesIO(conteudo), cifrado, tamanho_segmento=1024) == max(1, -(-tamanho // 1024))
+    decifrado = io.BytesIO()
+    cifrado.seek(0)
+    assert decifrar_fluxo(nova_chave, cifrado, decifrado)
+    assert decifrado.getvalue() == conteudo
+    if tamanho >= 4096:
+        trecho = io.BytesIO()
+        cifrado.seek(0)
+        assert decifrar_segmentos(nova_chave, cifrado, trecho, primeiro=1, quantidade=2)
+        assert trecho.getvalue() == conteudo[1024:3072]
+        trecho = io.BytesIO()
+        cifrado.seek(0)
+        assert decifrar_segmentos(nova_chave, cifrado, trecho, primeiro=3)
+        assert trecho.getvalue() == conteudo[3072:]
+
+
+def test_cifrar_fluxo_de_mmap(nova_chave, tmp_path):
+    conteudo = os.urandom(5000)
+    caminho = tmp_path / "dump"
+    caminho.write_bytes(conteudo)
+    cifrado = io.BytesIO()
+    with open(caminho, "rb") as arquivo, mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        assert cifrar_fluxo(nova_chave, mapa, cifrado, tamanho_segmento=1024) == 5
+    decifrado = io.BytesIO()
+    cifrado.seek(0)
+    assert decifrar_fluxo(nova_chave, cifrado, decifrado)
+    assert decifrado.getvalue() == conteudo
+
+    cifrado_em_disco = tmp_path / "dump.cifrado"
+    cifrado_em_disco.write_bytes(cifrado.getvalue())
+    trecho = io.BytesIO()
+    with open(cifrado_em_disco, "rb") as arquivo, mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        assert decifrar_segmentos(nova_chave, mapa, trecho, primeiro=2)
+    assert trecho.getvalue() == conteudo[2048:]
+
+
+def test_decifrar_fluxo_adulterado(nova_chave, chave_errada):
+    cifrado = io.BytesIO()
+    cifrar_fluxo(nova_chave, io.BytesIO(b"a" * 4096), cifrado, tamanho_segmento=1024)
+    dados = cifrado.getvalue()
+    cabecalho, tamanho_cifrado = 23, 1024 + TAMANHO_TAG
+    segmentos = [dados[i:i + tamanho_cifrado] for i in range(cabecalho, len(dados), tamanho_cifrado)]
+    trocados = dados[:cabecalho] + segmentos[1] + segmentos[0] + b"".join(segmentos[2:])
+    truncado = dados[:cabecalho + 3 * tamanho_cifrado]
+    outro_tamanho = dados[:3] + (2048).to_bytes(4, "big") + dados[7:]
+    for adulterado in (trocados, truncado, outro_tamanho, dados[:10]):
+        assert not decifrar_fluxo(nova_chave, io.BytesIO(adulterado), io.BytesIO())
+    assert not decifrar_fluxo(chave_errada, io.BytesIO(dados), io.BytesIO())
+    assert not decifrar_segmentos(nova_chave, io.BytesIO(truncado), io.BytesIO(), primeiro=2)
+    assert not decifrar_segmentos(nova_chave, io.BytesIO(dados), io.BytesIO(), primeiro=3, quantidade=2)
+    assert decifrar_segmentos(nova_chave, io.BytesIO(dados), io.BytesIO(), primeiro=3, quantidade=1)